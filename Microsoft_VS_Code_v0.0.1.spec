@@ -1,4 +1,6 @@
 # -*- mode: python ; coding: utf-8 -*-
+# Run `python build_asset_pack.py` first: resource/assets.pack is bundled with
+# the resource dir below and loaded instead of decoding the PNG/JPG files.
 
 
 a = Analysis(
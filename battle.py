@@ -0,0 +1,231 @@
+import random
+from collision import resolve_hits
+from constants import ENDLESS_ENEMY_CAP, SCREEN_WIDTH, SIM_DT
+from entities import ENEMY_TABLE, PLANT_TABLE, Bullet, Enemy, EntityGroup, EntityPool, Plant, sync_rects
+from lanes import LaneIndex
+from waves import EndlessWaveManager, WaveManager, compute_level_difficulty, starting_money_for_level
+
+
+# Pure simulation of one level: no drawing, no input, no wall clock.
+# Time only moves when step(dt) is called, so the same object is driven by
+# the game loop or run headless as fast as the CPU allows.
+class Battle:
+    # Recorded in replays and snapshots: the class that actually ran, which
+    # create_battle() may have picked over the requested one.
+    backend = "sprite"
+
+    def __init__(self, level, mode="STORY", selected_plants=None, spawn_delay=30000, warning_time=25000, seed=None):
+        self.level = level
+        self.mode = mode
+        self.selected_plants = list(selected_plants or [])
+        self.spawn_delay = spawn_delay
+        self.warning_time = warning_time
+
+        # Everything random in a battle derives from the seed (wave schedules
+        # and self.rng for entities), so the seed plus the input log
+        # reproduces a run exactly (see replay.py).
+        self.seed = seed if seed is not None else random.randrange(1 << 32)
+        self.rng = random.Random(self.seed)
+        if mode == "ENDLESS":
+            difficulty = 1.0
+            self.wave_manager = EndlessWaveManager(difficulty=difficulty, seed=self.seed)
+        else:
+            difficulty = compute_level_difficulty(level)
+            self.wave_manager = WaveManager(level, difficulty, seed=self.seed)
+        self.money = starting_money_for_level(level)
+
+        self.plants = EntityGroup()
+        self.lanes = LaneIndex()
+        self._init_entities()
+
+        self.time = 0
+        self.ticks = 0
+        self.enemies_killed = 0
+        self.plant_cd_status = {idx: -99999 for idx in self.selected_plants}
+
+        self.outcome = None
+        self.lose_enemy = None
+        # Optional profiling.PhaseTimer; step() laps its phases into it.
+        self.timer = None
+        # Player inputs as (tick, action, args); they apply after that tick.
+        self.inputs = []
+
+    def _init_entities(self):
+        self.enemies = EntityGroup()
+        self.bullets = EntityGroup()
+        self.enemy_pool = EntityPool(Enemy)
+        self.bullet_pool = EntityPool(Bullet)
+        self.stack_heads = {}
+
+    @property
+    def enemy_cap(self):
+        return ENDLESS_ENEMY_CAP if self.mode == "ENDLESS" else None
+
+    def spawn_enemy(self, e_id, row):
+        cap = self.enemy_cap
+        if cap is not None and len(self.enemies) >= cap:
+            head = self.stack_heads.get((e_id, row))
+            if head is None or not head.alive() or head.id != e_id or head.row != row:
+                head = self.stack_target(e_id, row)
+            if head is not None:
+                stats = ENEMY_TABLE[e_id]
+                head.hp += stats.hp
+                head.reward += stats.reward
+                head.stack += 1
+                return head
+        enemy = self.enemy_pool.acquire(e_id, row)
+        self.enemies.add(enemy)
+        self.stack_heads[(e_id, row)] = enemy
+        return enemy
+
+    def stack_target(self, e_id, row):
+        # Cap reached and no live head of this type in this row: merge into
+        # the newest enemy in the row, else of the type, else any at all.
+        in_row = of_type = last = None
+        for e in self.enemies:
+            last = e
+            if e.row == row:
+                in_row = e
+            if e.id == e_id:
+                of_type = e
+        if in_row is not None:
+            return in_row
+        if of_type is not None:
+            return of_type
+        return last
+
+    @property
+    def finished(self):
+        return self.outcome is not None
+
+    def cooldown_remaining(self, p_idx):
+        last_p = self.plant_cd_status.get(p_idx, 0)
+        return PLANT_TABLE[p_idx].cooldown - (self.time - last_p)
+
+    def can_place(self, p_idx):
+        # plant_cd_status holds exactly the selected plants.
+        return (
+            p_idx in self.plant_cd_status
+            and self.cooldown_remaining(p_idx) <= 0
+            and self.money >= PLANT_TABLE[p_idx].cost
+        )
+
+    def plant_at(self, row, col):
+        return self.lanes.plant_at(row, col)
+
+    def pool_stats(self):
+        pools = {"enemies": self.enemy_pool, "bullets": self.bullet_pool}
+        return {name: pool.stats() for name, pool in pools.items() if pool is not None}
+
+    def entity_counts(self):
+        return {"plants": len(self.plants), "enemies": len(self.enemies), "bullets": len(self.bullets)}
+
+    def record(self, action, *args):
+        self.inputs.append((self.ticks, action, args))
+
+    def place_plant(self, p_idx, row, col):
+        # The rules live here, not in the UI: replays and restored battles
+        # go through the same checks.
+        if not self.can_place(p_idx) or self.plant_at(row, col) is not None:
+            return None
+        self.money -= PLANT_TABLE[p_idx].cost
+        plant = Plant(p_idx, (row, col), self.time)
+        self.plants.add(plant)
+        self.lanes.add_plant(plant)
+        self.plant_cd_status[p_idx] = self.time
+        self.record("place", p_idx, row, col)
+        return plant
+
+    def remove_plant(self, row, col):
+        plant = self.plant_at(row, col)
+        if plant is not None:
+            plant.kill()
+            self.lanes.remove_plant(plant)
+            self.record("remove", row, col)
+        return plant
+
+    def _reward(self, enemy):
+        enemy.kill()
+        self.money += enemy.reward
+        self.enemies_killed += enemy.stack
+
+    def step(self, dt):
+        if self.outcome is not None:
+            return self.outcome
+
+        self.time += dt
+        self.ticks += 1
+        now = self.time
+        timer = self.timer
+        if timer:
+            timer.resume()
+
+        if now > self.spawn_delay:
+            for (e_id, row) in self.wave_manager.update(now):
+                self.spawn_enemy(e_id, row)
+        if timer:
+            timer.lap("spawn")
+
+        self.lanes.rebuild_enemies(self.enemies)
+        self.plants.update(now, self.lanes, self.bullets, game_ref=self)
+        if timer:
+            timer.lap("plants")
+        self.bullets.update()
+        sync_rects(self.bullets)
+        if timer:
+            timer.lap("bullets")
+        self.enemies.update(self.lanes)
+        sync_rects(self.enemies)
+        if timer:
+            timer.lap("enemies")
+
+        hits = resolve_hits(self.enemies, self.bullets)
+        for enemy, hit_bullets in hits.items():
+            if not enemy.alive():
+                continue
+
+            total_damage = 0
+            for b in hit_bullets:
+                total_damage += b.damage
+                b.kill()
+
+            enemy.hp -= total_damage
+
+            if enemy.hp <= 0 and enemy.alive():
+                self._reward(enemy)
+
+        for enemy in list(self.enemies):
+            if enemy.hp <= 0 and enemy.alive():
+                self._reward(enemy)
+
+        if self.mode != "ENDLESS":
+            if self.wave_manager.finished_spawning:
+                for e in list(self.enemies):
+                    if e.rect.x >= SCREEN_WIDTH:
+                        e.kill()
+                if len(self.enemies) == 0:
+                    self.outcome = "WIN"
+                    if timer:
+                        timer.lap("collision")
+                    return self.outcome
+
+        for e in list(self.enemies):
+            if e.rect.x > SCREEN_WIDTH + 200 or e.rect.x < -200:
+                e.kill()
+
+        for e in self.enemies:
+            if e.rect.x < 200:
+                self.outcome = "LOSE"
+                self.lose_enemy = e
+                break
+
+        if timer:
+            timer.lap("collision")
+        return self.outcome
+
+    def run(self, dt=SIM_DT, max_time=None):
+        while self.outcome is None:
+            if max_time is not None and self.time >= max_time:
+                break
+            self.step(dt)
+        return self.outcome
@@ -0,0 +1,155 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+from constants import GRID_COLS, GRID_ROWS, PLANT_STATS, SCREEN_HEIGHT, SCREEN_WIDTH, SIM_DT
+from entities import PLANT_TABLE
+from profiling import PhaseTimer
+from render import DirtyRenderer
+from resources import R
+from vector_battle import create_battle
+from waves import EndlessWaveManager
+
+PHASES = ("spawn", "plants", "bullets", "enemies", "collision", "draw")
+ENDLESS_WAVES = (1, 10, 30, 60)
+# Column layout (left to right) used to hold the line in the endless scenarios.
+DEFENCE = (14, 0, 0, 5, 9, 10, 13, 8, 11, 11)
+
+
+# Headless benchmark of the battle hot path: the same Battle.step() and
+# DirtyRenderer calls update_gaming() makes, timed per phase. Results go to a
+# JSON file; pass a previous file with --baseline to print the change.
+def make_battle(backend, plants, wave=1, seed=0):
+    battle = create_battle(
+        {"id": "bench", "theme": 1}, "ENDLESS", sorted(set(plants)), spawn_delay=0, seed=seed, backend=backend
+    )
+    battle.wave_manager = EndlessWaveManager(seed=seed, start_wave=wave)
+    for row in range(GRID_ROWS):
+        for col in range(GRID_COLS):
+            # Scenario setup, not play: pay for each plant and skip its cooldown.
+            p_idx = plants[col]
+            battle.money += PLANT_TABLE[p_idx].cost
+            battle.plant_cd_status[p_idx] = -99999
+            battle.place_plant(p_idx, row, col)
+    return battle
+
+
+def scenarios():
+    for idx, stats in enumerate(PLANT_STATS):
+        yield f"grid_{idx:02d}_{stats['name']}", [idx] * GRID_COLS, 1
+    for wave in ENDLESS_WAVES:
+        yield f"endless_wave_{wave:02d}", DEFENCE, wave
+
+
+def run_scenario(screen, background, backend, plants, wave, frames, seed):
+    battle = make_battle(backend, plants, wave, seed)
+    timer = PhaseTimer()
+    battle.timer = timer
+    renderer = DirtyRenderer(screen)
+    peak_enemies = peak_bullets = 0
+
+    for frame in range(frames):
+        timer.start()
+        if battle.step(SIM_DT):
+            break
+        renderer.begin(background, frame)
+        renderer.draw_group(battle.plants)
+        enemies = battle.enemies
+        bullets = battle.bullets
+        renderer.draw_group(enemies)
+        renderer.draw_group(bullets)
+        renderer.end()
+        timer.lap("draw")
+        peak_enemies = max(peak_enemies, len(enemies))
+        peak_bullets = max(peak_bullets, len(bullets))
+
+    ms = timer.ms_per_frame()
+    ms = {phase: round(ms.get(phase, 0.0), 4) for phase in PHASES}
+    ms["total"] = round(sum(ms.values()), 4)
+    return {
+        "backend": battle.backend,
+        "frames": timer.frames,
+        "outcome": battle.outcome,
+        "peak_enemies": peak_enemies,
+        "peak_bullets": peak_bullets,
+        "ms_per_frame": ms,
+        "pools": battle.pool_stats(),
+    }
+
+
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def print_report(results, baseline=None):
+    base = (baseline or {}).get("scenarios", {})
+    header = f"{'scenario':32}" + "".join(f"{p:>10}" for p in PHASES) + f"{'total':>10}"
+    print(header)
+    for name, res in results["scenarios"].items():
+        ms = res["ms_per_frame"]
+        line = f"{name:32}" + "".join(f"{ms[p]:10.3f}" for p in PHASES) + f"{ms['total']:10.3f}"
+        old = base.get(name)
+        if old and old["ms_per_frame"].get("total"):
+            change = (ms["total"] / old["ms_per_frame"]["total"] - 1) * 100
+            line += f"  {change:+.1f}%"
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the battle hot path headlessly.")
+    parser.add_argument("--frames", type=int, default=1800, help="sim ticks per scenario")
+    parser.add_argument("--backend", default="sprite", choices=("sprite", "numpy"))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", default="", help="run scenarios whose name contains this")
+    parser.add_argument("--out", default="benchmark_results.json")
+    parser.add_argument("--baseline", help="previous results file to compare against")
+    args = parser.parse_args(argv)
+
+    pygame.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    R.load_sprite_assets()
+    background = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)).convert()
+
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "backend": args.backend,
+            "frames": args.frames,
+            "seed": args.seed,
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+        },
+        "scenarios": {},
+    }
+    for name, plants, wave in scenarios():
+        if args.only in name:
+            results["scenarios"][name] = run_scenario(screen, background, args.backend, plants, wave, args.frames, args.seed)
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+
+    baseline = None
+    if args.baseline:
+        try:
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                baseline = json.load(f)
+        except Exception as e:
+            print(f"Error loading baseline: {e}")
+    print_report(results, baseline)
+    print(f"Wrote {args.out}")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
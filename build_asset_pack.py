@@ -0,0 +1,25 @@
+import os
+import pygame
+from resources import PACK_PATH, R, resource_path, write_asset_pack
+
+
+# Pre-decodes every registered image into resource/assets.pack so startup
+# maps raw pixels instead of decoding ~90 PNG/JPG files. Run it before
+# building with PyInstaller (the pack ships inside the "resource" data dir).
+def main():
+    R.register_assets()
+    paths = sorted({path for path, _ in R.image_manifest.values()})
+    images = []
+    for rel_path in paths:
+        try:
+            images.append((rel_path, pygame.image.load(resource_path(rel_path))))
+        except Exception as e:
+            print(f"Skipped {rel_path}: {e}")
+
+    out = resource_path(PACK_PATH)
+    count = write_asset_pack(out, images)
+    print(f"Wrote {count} images to {out} ({os.path.getsize(out) // 1024} KB)")
+
+
+if __name__ == "__main__":
+    main()
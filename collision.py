@@ -0,0 +1,45 @@
+from bisect import bisect_left, bisect_right
+
+
+# Lane-sweep replacement for pygame.sprite.groupcollide(enemies, bullets).
+# Enemies are bucketed by row and sorted by left edge; each bullet only
+# visits the rows its rect vertically overlaps (one for straight shots, the
+# rows an arc passes through for throwers) and, inside a row, only the
+# enemies whose x-interval can reach it. Returns {enemy: [bullets]} with the
+# same pairs groupcollide would produce.
+def resolve_hits(enemies, bullets):
+    by_row = {}
+    for e in enemies:
+        lane = by_row.get(e.row)
+        if lane is None:
+            lane = by_row[e.row] = []
+        lane.append(e)
+    if not by_row:
+        return {}
+
+    lanes = []
+    for lane in by_row.values():
+        lane.sort(key=lambda e: e.rect.left)
+        lefts = [e.rect.left for e in lane]
+        top = min(e.rect.top for e in lane)
+        bottom = max(e.rect.bottom for e in lane)
+        max_w = max(e.rect.width for e in lane)
+        lanes.append((lane, lefts, top, bottom, max_w))
+
+    hits = {}
+    for b in bullets:
+        br = b.rect
+        for lane, lefts, top, bottom, max_w in lanes:
+            if br.top >= bottom or br.bottom <= top:
+                continue
+            lo = bisect_right(lefts, br.left - max_w)
+            hi = bisect_left(lefts, br.right)
+            for i in range(lo, hi):
+                e = lane[i]
+                if e.rect.colliderect(br):
+                    hit_bullets = hits.get(e)
+                    if hit_bullets is None:
+                        hits[e] = [b]
+                    else:
+                        hit_bullets.append(b)
+    return hits
@@ -1,7 +1,31 @@
 SCREEN_WIDTH = 1600
 SCREEN_HEIGHT = 900
 FPS = 60
+# States whose picture only changes on input. Once drawn, the main loop sleeps
+# in pygame.event.wait() (waking at least every IDLE_WAIT_MS) and skips the
+# redraw and flip until an event arrives.
+IDLE_STATES = ("MAIN_MENU", "MODE_SELECT", "LEVEL_SELECT", "PLANT_SELECT", "OPTIONS", "CREDITS", "ARCHIVE", "PAUSE")
+IDLE_WAIT_MS = 500
+# Fixed simulation rate. Entity speeds and damage are per tick at this rate,
+# independent of how many frames are actually rendered.
+SIM_HZ = 60
+SIM_DT = 1000 / SIM_HZ
+# Catch-up limit per rendered frame before the backlog is dropped.
+MAX_SIM_STEPS = 5
+# Live enemies allowed in endless mode (a hard limit); past this, a new spawn
+# is merged into the last enemy of the same type and row, else of the row,
+# else of the type, else any (summed HP and reward). None = no cap.
+ENDLESS_ENEMY_CAP = 150
 SAVE_PATH = "save.json"
+# Every finished or abandoned battle is written here (see replay.py).
+REPLAY_DIR = "replays"
+# Battle left from the pause menu, resumed from the main menu (see snapshot.py).
+SUSPEND_PATH = "suspend.vsbs"
+# Final-level win image zooms between these scales (baked during the last wave).
+WIN_ZOOM_START = 0.25
+WIN_ZOOM_END = 1.05
+# "sprite" or "numpy" (vector_battle.VectorBattle, falls back without numpy)
+BATTLE_BACKEND = "sprite"
 
 # Archive buttons layout
 ARCHIVE_BUTTONS = [
@@ -1,4 +1,6 @@
 import random
+from collections import namedtuple
+from math import floor
 import pygame
 from constants import (
     SCREEN_WIDTH,
@@ -6,95 +8,208 @@ from constants import (
     GRID_START_Y,
     CELL_WIDTH,
     CELL_HEIGHT,
-    GRID_ROWS,
-    GRID_COLS,
     PLANT_STATS,
     ENEMY_STATS,
 )
 from resources import R
 
+# Plant behaviours as small ints, compared instead of PLANT_STATS "type" strings.
+PT_STR, PT_THR, PT_ECO, PT_SUR, PT_SPE = range(5)
+PLANT_TYPES = {"str": PT_STR, "thr": PT_THR, "eco": PT_ECO, "sur": PT_SUR, "spe": PT_SPE}
+
+# Immutable per-id stat rows shared by every entity of that id; entities keep
+# a reference instead of copying fields. PLANT_STATS/ENEMY_STATS remain the
+# source (and what the menus read).
+PlantStats = namedtuple("PlantStats", "hp fire_rate damage cost cooldown type image bullet_image")
+EnemyStats = namedtuple("EnemyStats", "hp speed reward image")
+
+PLANT_TABLE = tuple(
+    PlantStats(s["hp"], s["fire_rate"], s["damage"], s["cost"], s["cooldown"], PLANT_TYPES[s["type"]], f"idle_{i+1}", f"bullet_{i+1}")
+    for i, s in enumerate(PLANT_STATS)
+)
+ENEMY_TABLE = tuple(
+    EnemyStats(s["hp"], s["speed"], s["reward"], f"enemy_{e_id+1}")
+    for e_id, s in sorted(ENEMY_STATS.items())
+)
+
+
+# Slotted stand-in for pygame.sprite.Sprite: same add_internal /
+# remove_internal protocol, so pygame Groups hold it, but no per-instance
+# __dict__. Subclasses list their fields in __slots__ too.
+class Sprite:
+    __slots__ = ("image", "rect", "x", "y", "prev_pos", "pool", "_groups")
 
-class Sprite(pygame.sprite.Sprite):
     def __init__(self, image, x, y):
-        super().__init__()
+        self._groups = set()
+        # EntityPool that gets this sprite back when it is killed.
+        self.pool = None
+        self.rect = image.get_rect()
+        self.place(image, x, y)
+
+    def place(self, image, x, y):
         self.image = image
-        self.rect = self.image.get_rect()
+        self.rect.size = image.get_size()
         self.rect.topleft = (x, y)
+        # Sub-pixel position; rect follows it through sync_rects() once per
+        # sim tick. prev_pos is the position before the last tick, for
+        # interpolated drawing.
+        self.x = float(x)
+        self.y = float(y)
+        self.prev_pos = (self.x, self.y)
+
+    def add_internal(self, group):
+        self._groups.add(group)
+
+    def remove_internal(self, group):
+        self._groups.remove(group)
+
+    def groups(self):
+        return list(self._groups)
+
+    def alive(self):
+        return bool(self._groups)
+
+    def update(self, *args, **kwargs):
+        pass
+
+    def kill(self):
+        if not self._groups:
+            return
+        for group in self._groups:
+            group.remove_internal(self)
+        self._groups.clear()
+        if self.pool is not None:
+            self.pool.release(self)
+
+
+# Group for the slotted sprites above. pygame's Group.add() only fast-paths
+# pygame.sprite.Sprite instances and would try to iterate anything else.
+class EntityGroup(pygame.sprite.Group):
+    def add(self, *sprites):
+        for sprite in sprites:
+            if sprite not in self.spritedict:
+                self.add_internal(sprite)
+                sprite.add_internal(self)
+
+
+# Free list of killed sprites of one class. acquire() takes the constructor's
+# arguments and either resets a released sprite with them (a hit) or builds
+# a new one (a miss); killing a pooled sprite puts it back.
+class EntityPool:
+    def __init__(self, cls):
+        self.cls = cls
+        self.free = []
+        self.hits = 0
+        self.misses = 0
+
+    def acquire(self, *args):
+        if self.free:
+            self.hits += 1
+            obj = self.free.pop()
+            obj.reset(*args)
+            return obj
+        self.misses += 1
+        obj = self.cls(*args)
+        obj.pool = self
+        return obj
+
+    def release(self, obj):
+        self.free.append(obj)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "free": len(self.free),
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+def sync_rects(sprites):
+    for s in sprites:
+        s.rect.topleft = (floor(s.x), floor(s.y))
 
 
 class Plant(Sprite):
-    def __init__(self, p_id, grid_pos):
+    __slots__ = ("id", "stats", "hp", "type", "row", "col", "last_fire")
+
+    def __init__(self, p_id, grid_pos, now=0):
         row, col = grid_pos
         x = GRID_START_X + col * CELL_WIDTH - 55
         y = GRID_START_Y + row * CELL_HEIGHT - 55
-        img = R.get_image(f"idle_{p_id+1}")
-        super().__init__(img, x, y)
+        stats = PLANT_TABLE[p_id]
+        super().__init__(R.get_image(stats.image), x, y)
 
-        stats = PLANT_STATS[p_id]
         self.id = p_id
-        self.hp = stats["hp"]
-        self.max_hp = stats["hp"]
-        self.damage = stats["damage"]
-        self.fire_rate = stats["fire_rate"]
-        self.type = stats["type"]
+        self.stats = stats
+        self.hp = stats.hp
+        self.type = stats.type
         self.row = row
         self.col = col
-        self.last_fire = pygame.time.get_ticks()
+        self.last_fire = now
 
-    def update(self, current_time, enemies, bullets_group, game_ref=None):
-        if self.type == "eco":
-            if current_time - self.last_fire > self.fire_rate:
+    def update(self, current_time, lanes, bullets_group, game_ref=None):
+        kind = self.type
+        if kind == PT_ECO:
+            if current_time - self.last_fire > self.stats.fire_rate:
                 self.last_fire = current_time
                 if game_ref:
                     game_ref.money += 25
             return
 
-        if self.type == "spe" or self.type == "sur":
+        if kind >= PT_SUR:
             return
 
-        lane_enemies = [
-            e
-            for e in enemies
-            if e.row == self.row and e.rect.x > self.rect.x and e.rect.x < SCREEN_WIDTH
-        ]
-        if not lane_enemies:
+        target = lanes.frontmost_enemy(self.row, self.rect.x)
+        if target is None:
             return
 
-        lane_enemies.sort(key=lambda e: e.rect.x)
-        target = lane_enemies[0]
-
-        if current_time - self.last_fire > self.fire_rate:
+        if current_time - self.last_fire > self.stats.fire_rate:
             self.last_fire = current_time
-            self.fire(bullets_group, target)
+            if game_ref:
+                self.fire(bullets_group, target, game_ref.rng, game_ref.bullet_pool)
+            else:
+                self.fire(bullets_group, target)
 
-    def fire(self, bullets_group, target=None):
+    def fire(self, bullets_group, target=None, rng=None, pool=None):
         bx = self.rect.centerx + 20
         by = self.rect.centery - 35
-        if self.type == "thr":
+        if self.type == PT_THR:
             bx -= 20
             by -= 40
 
-        img_key = f"bullet_{self.id+1}"
-        b_img = R.get_image(img_key)
-        bullet = Bullet(b_img, bx, by, self.damage, self.row, self.type, target)
-        bullets_group.add(bullet)
+        b_img = R.get_image(self.stats.bullet_image)
+        args = (b_img, bx, by, self.stats.damage, self.row, self.type, target, rng)
+        bullets_group.add(pool.acquire(*args) if pool else Bullet(*args))
 
 
 class Bullet(Sprite):
-    def __init__(self, image, x, y, damage, row, b_type, target=None):
+    __slots__ = ("damage", "row", "b_type", "speed", "vy", "start_y")
+    gravity = 0.45
+
+    def __init__(self, image, x, y, damage, row, b_type, target=None, rng=None):
         super().__init__(image, x, y)
+        self.setup(damage, row, b_type, target, rng)
+
+    def reset(self, image, x, y, damage, row, b_type, target=None, rng=None):
+        self.place(image, x, y)
+        self.setup(damage, row, b_type, target, rng)
+
+    def setup(self, damage, row, b_type, target, rng):
+        x = self.x
+        y = self.y
         self.damage = damage
         self.row = row
         self.b_type = b_type
         self.speed = 10
         self.vy = 0
-        self.gravity = 0.45
         self.start_y = y
 
-        if b_type == "thr":
+        if b_type == PT_THR:
             self.speed = 8
             if target:
-                tx = target.rect.centerx + random.randint(-20, 20)
+                tx = target.rect.centerx + (rng or random).randint(-20, 20)
                 dist = tx - x
                 if dist > 0:
                     t = dist / self.speed
@@ -103,49 +218,58 @@ class Bullet(Sprite):
                 self.vy = -10
 
     def update(self):
-        if self.b_type == "str":
-            self.rect.x += self.speed
-        elif self.b_type == "thr":
-            self.rect.x += self.speed
-            self.rect.y += self.vy
+        self.prev_pos = (self.x, self.y)
+        if self.b_type == PT_STR:
+            self.x += self.speed
+        elif self.b_type == PT_THR:
+            self.x += self.speed
+            self.y += self.vy
             self.vy += self.gravity
-            if self.rect.y > self.start_y + 100:
+            if self.y > self.start_y + 100:
                 self.kill()
 
-        if self.rect.x > SCREEN_WIDTH:
+        if self.x > SCREEN_WIDTH:
             self.kill()
 
 
 class Enemy(Sprite):
+    __slots__ = ("stats", "id", "hp", "speed", "reward", "row", "is_attacking", "target_plant", "frozen", "stack")
+    damage_per_frame = 0.5
+
     def __init__(self, e_id, row):
-        self.stats = ENEMY_STATS[e_id]
-        img = R.get_image(f"enemy_{e_id+1}")
-        center_y = GRID_START_Y + row * CELL_HEIGHT
-        x = SCREEN_WIDTH
-        y = center_y - 55
-        super().__init__(img, x, y)
+        img = R.get_image(ENEMY_TABLE[e_id].image)
+        super().__init__(img, SCREEN_WIDTH, GRID_START_Y + row * CELL_HEIGHT - 55)
+        self.setup(e_id, row)
+
+    def reset(self, e_id, row):
+        img = R.get_image(ENEMY_TABLE[e_id].image)
+        self.place(img, SCREEN_WIDTH, GRID_START_Y + row * CELL_HEIGHT - 55)
+        self.setup(e_id, row)
 
+    def setup(self, e_id, row):
+        stats = ENEMY_TABLE[e_id]
+        self.stats = stats
         self.id = e_id
-        self.hp = self.stats["hp"]
-        self.speed = self.stats["speed"]
-        self.reward = self.stats["reward"]
-        self.damage_per_frame = 0.5
+        self.hp = stats.hp
+        self.speed = stats.speed
+        self.reward = stats.reward
         self.row = row
         self.is_attacking = False
         self.target_plant = None
         self.frozen = False
+        # Enemies merged into this one by the endless-mode cap.
+        self.stack = 1
 
-    def update(self, plants_group):
+    def update(self, lanes):
+        self.prev_pos = (self.x, self.y)
         if self.frozen:
             return
 
-        hit_plants = pygame.sprite.spritecollide(self, plants_group, False)
         target = None
-        for p in hit_plants:
-            if p.row == self.row:
-                if self.rect.right > p.rect.left + 20:
-                    target = p
-                    break
+        for p in lanes.plants_touching(self.row, self.rect):
+            if self.rect.right > p.rect.left + 20:
+                target = p
+                break
 
         if target:
             self.is_attacking = True
@@ -153,9 +277,10 @@ class Enemy(Sprite):
             target.hp -= self.damage_per_frame
             if target.hp <= 0:
                 target.kill()
+                lanes.remove_plant(target)
                 self.is_attacking = False
         else:
             self.is_attacking = False
 
         if not self.is_attacking:
-            self.rect.x -= self.speed
+            self.x -= self.speed
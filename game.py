@@ -1,3 +1,4 @@
+import os
 import sys
 import pygame
 from constants import (
@@ -13,6 +14,8 @@ from constants import (
     GRID_START_X,
     GRID_START_Y,
     HOVER_COLOR,
+    IDLE_STATES,
+    IDLE_WAIT_MS,
     PLANT_STATS,
     RED,
     SCREEN_HEIGHT,
@@ -22,6 +25,7 @@ from constants import (
     SELECT_SLOT_SIZE,
     SELECT_START_X,
     SELECT_START_Y,
+    SUSPEND_PATH,
     WHITE,
     FPS,
 )
@@ -29,6 +33,8 @@ from entities import Plant, Enemy
 from game_common import GameCommonMixin
 from game_state_menu import GameMenuMixin
 from game_state_play import GamePlayMixin
+from profiling import FrameProfiler
+from render import DirtyRenderer
 from resources import R, resource_path
 from save_manager import SaveManager
 from waves import WaveManager, compute_level_difficulty, starting_money_for_level
@@ -43,6 +49,11 @@ class Game(GameCommonMixin, GameMenuMixin, GamePlayMixin):
         pg.display.set_caption("Microsoft VS Code - Rewritten")
         self.clock = pg.time.Clock()
         self.running = True
+        self.frame_count = 0
+        self.dirty_rects = None
+        self.gaming_renderer = DirtyRenderer(self.screen)
+        # F3 toggles the frame profiler overlay, F4 dumps its recording.
+        self.profiler = FrameProfiler()
 
         R.load_assets()
         self.sfx_channel = pygame.mixer.Channel(6)
@@ -95,12 +106,15 @@ class Game(GameCommonMixin, GameMenuMixin, GamePlayMixin):
         self.selected_level = None
         self.selected_plants_indices = []
 
-        self.plants = pygame.sprite.Group()
-        self.enemies = pygame.sprite.Group()
-        self.bullets = pygame.sprite.Group()
-        self.money = 3000
-        self.wave_manager = None
-        self.game_start_tick = 0
+        self.battle = None
+        # snapshot.capture() bytes: F5 stores, F9 rolls the battle back to it.
+        self.battle_checkpoint = None
+        self.has_suspended = os.path.exists(SUSPEND_PATH)
+        self.suspended_snapshot = None
+        self.battle_last_tick = 0
+        self.sim_accumulator = 0
+        # >1 runs the battle faster than real time (more sim ticks per frame).
+        self.sim_time_scale = 1.0
         self.spawn_delay = 30000
         self.warning_time = 25000
         self.win_sound_played = False
@@ -130,6 +144,10 @@ class Game(GameCommonMixin, GameMenuMixin, GamePlayMixin):
         self.debug_mode = False
         self.last_debug_log = 0
         self.archive_message = ""
+        # static_layer() cache for the current screen: (name, key, Surface).
+        self.static_layer_cache = None
+        # State whose last frame is on screen and that may idle (see run()).
+        self.idle_state = None
         self.archive_mode = "main"
         self.archive_page = 0
         self.credits_page = 0
@@ -157,13 +175,29 @@ class Game(GameCommonMixin, GameMenuMixin, GamePlayMixin):
         self.lose_enemy_target = (978, 460)
         self.lose_enemy_img_key = None
         self.lose_enemy_id = None
+        # Frozen composites for PAUSE/LOSE, built once per visit (see game_state_play).
+        self.pause_frame = None
+        self.lose_world = None
+        self.lose_final_frame = None
 
         self.guidance_force_hide = False
         self.guidance_show_until = 0
 
     def run(self):
+        profiler = self.profiler
         while self.running:
-            raw_events = pygame.event.get()
+            profiling = profiler.enabled
+            if profiling:
+                profiler.begin_frame()
+            if self.idle_state == self.state and not profiling:
+                # Nothing animates here: block until input instead of redrawing
+                # an unchanged screen 60 times a second.
+                e = pygame.event.wait(IDLE_WAIT_MS)
+                if e.type == pygame.NOEVENT:
+                    continue
+                raw_events = [e] + pygame.event.get()
+            else:
+                raw_events = pygame.event.get()
             now = pygame.time.get_ticks()
 
             events = []
@@ -183,6 +217,15 @@ class Game(GameCommonMixin, GameMenuMixin, GamePlayMixin):
                     self.save_data["unlocked"]["1"] = 5
                     self.save_data["unlocked"]["2"] = 5
                     SaveManager.save(self.save_data)
+                if e.type == pygame.KEYDOWN and e.key == pygame.K_F3:
+                    profiler.toggle()
+                if e.type == pygame.KEYDOWN and e.key == pygame.K_F4:
+                    profiler.dump()
+
+            if self.battle is not None:
+                self.battle.timer = profiler.timer if profiling else None
+            if profiling:
+                profiler.timer.lap("events")
 
             state_before = self.state
             if self.state == "MAIN_MENU":
@@ -212,10 +255,42 @@ class Game(GameCommonMixin, GameMenuMixin, GamePlayMixin):
 
             if self.state != state_before:
                 self.mouse_block_until = pygame.time.get_ticks() + 200
+                # The new state has not drawn yet; it gets at least one frame.
+                self.idle_state = None
+                self.static_layer_cache = None
+            else:
+                self.idle_state = self.state if self.state in IDLE_STATES else None
+
+            if self.state == "PAUSE" and self.pause_frame is None:
+                # Freeze the pause frame from the battle render alone, before
+                # the profiler overlay is drawn on top of it.
+                self.freeze_pause_frame()
+                self.dirty_rects = None
+
+            if profiling:
+                profiler.timer.lap("draw")
+            if profiling and profiler.enabled:
+                rect = profiler.draw(self.screen, pygame.time.get_ticks())
+                if self.dirty_rects is not None:
+                    self.dirty_rects.append(self.gaming_renderer.overlay(rect))
+            if profiling:
+                profiler.sample(self.battle.entity_counts() if self.battle is not None else None)
 
             self.clock.tick(FPS)
-            pygame.display.flip()
+            if profiling:
+                profiler.timer.lap("wait")
+            if self.dirty_rects is None:
+                pygame.display.flip()
+            else:
+                pygame.display.update(self.dirty_rects)
+            self.dirty_rects = None
+            if profiling:
+                profiler.timer.lap("flip")
+                profiler.end_frame(self.frame_count)
+            self.frame_count += 1
 
+        # Let the save writer finish before the process goes away.
+        SaveManager.flush()
         pygame.quit()
         sys.exit()
 
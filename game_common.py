@@ -1,25 +1,26 @@
 import pygame
-from constants import BLACK, SCREEN_HEIGHT, SCREEN_WIDTH
+from constants import BLACK, SCREEN_HEIGHT, SCREEN_WIDTH, WHITE
 from resources import R
 
+GUIDANCE_RECT = pygame.Rect(70, 140, SCREEN_WIDTH, 200)
+
 
 class GameCommonMixin:
     def draw_text(self, text, x, y, font_key="default", color=BLACK, center=False):
-        font = R.fonts.get(font_key, R.fonts["default"])
-        surf = font.render(str(text), True, color)
+        surf = R.render_text(text, font_key, color)
         rect = surf.get_rect()
         if center:
             rect.center = (x, y)
         else:
             rect.topleft = (x, y)
-        self.screen.blit(surf, rect)
+        return self.screen.blit(surf, rect)
 
     def mouse_ready(self):
         now = pygame.time.get_ticks()
         return now >= self.mouse_block_until and now >= self.mouse_cooldown_end
 
     def play_sfx(self, name, volume=1.0):
-        snd = R.sounds.get(name)
+        snd = R.get_sound(name)
         if not snd:
             return
         snd.set_volume(volume)
@@ -29,9 +30,26 @@ class GameCommonMixin:
         except Exception:
             snd.play()
 
-    def render_slider(self, label, value, x, y, events):
-        bar_w, bar_h = 320, 12
-        bar_rect = pygame.Rect(x, y + 20, bar_w, bar_h)
+    def static_layer(self, name, key, build):
+        # Menu screens change only on hover, selection, unlock or a slider
+        # move; key captures those. build() draws the screen once, the result
+        # is kept as a copy and blitted whole while the key stays the same.
+        # Only the current screen's layer is kept (run() drops it on a state
+        # change), so at most one full-screen copy is alive.
+        layer = self.static_layer_cache
+        if layer is not None and layer[0] == name and layer[1] == key:
+            self.screen.blit(layer[2], (0, 0))
+            return False
+        self.static_layer_cache = None
+        build()
+        self.static_layer_cache = (name, key, R.track_surface(self.screen.copy()))
+        return True
+
+    def slider_rect(self, x, y):
+        return pygame.Rect(x, y + 20, 320, 12)
+
+    def draw_slider(self, label, value, x, y):
+        bar_rect = self.slider_rect(x, y)
         pygame.draw.rect(self.screen, (210, 210, 210), bar_rect, border_radius=4)
         pygame.draw.rect(self.screen, (80, 80, 80), bar_rect, 2, border_radius=4)
 
@@ -41,6 +59,9 @@ class GameCommonMixin:
         pygame.draw.rect(self.screen, BLACK, knob_rect, 2, border_radius=4)
 
         self.draw_text(label, x, y - 5, "default", BLACK)
+
+    def slider_input(self, value, x, y, events):
+        bar_rect = self.slider_rect(x, y)
         changed = False
         for e in events:
             if e.type == pygame.MOUSEBUTTONDOWN and e.button == 1:
@@ -50,15 +71,12 @@ class GameCommonMixin:
                     changed = True
         return value, changed
 
-    def draw_guidance_overlay(self, now):
-        show = now < self.guidance_show_until and not self.guidance_force_hide
-        if not show:
-            return
+    def guidance_shown(self, now):
+        return now < self.guidance_show_until and not self.guidance_force_hide
 
-        overlay = pygame.Surface((SCREEN_WIDTH, 200), pygame.SRCALPHA)
-        overlay.fill((255, 255, 255, 205))
-        self.screen.blit(overlay, (70, 140))
-        pygame.draw.rect(self.screen, BLACK, (70, 140, SCREEN_WIDTH - 140, 200), 2, border_radius=12)
+    def draw_guidance_overlay(self):
+        self.screen.blit(R.get_overlay((SCREEN_WIDTH, 200), WHITE, 205), (70, 140))
+        self.screen.blit(R.get_outline((SCREEN_WIDTH - 140, 200), BLACK, 2, 12), (70, 140))
 
         lines = [
             "左键点卡牌再点格子放置 IDE，右键取消选择",
@@ -70,6 +88,7 @@ class GameCommonMixin:
         for line in lines:
             self.draw_text(line, 100, y, "default", BLACK)
             y += 40
+        return GUIDANCE_RECT
 
     def start_story(self, key, after_state):
         self.story_active_key = key
@@ -78,7 +97,7 @@ class GameCommonMixin:
         self.story_shown[key] = True
         self.story_start_time = pygame.time.get_ticks()
         if key == "1-1":
-            snd = R.sounds.get("start")
+            snd = R.get_sound("start")
             if snd:
                 snd.set_volume(0.5)
                 self.sfx_channel.play(snd)
@@ -23,29 +23,31 @@ from save_manager import SaveManager
 
 class GameMenuMixin:
     def update_mode_select(self, events):
-        self.screen.blit(R.get_image("bg_credits"), (0, 0))
-
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-        overlay.fill((255, 255, 255, 120))
-        self.screen.blit(overlay, (0, 0))
-
         mx, my = pygame.mouse.get_pos()
 
         story_rect = self.mode_story_rect
         endless_rect = self.mode_endless_rect
+        story_hover = story_rect.collidepoint(mx, my)
+        endless_hover = endless_rect.collidepoint(mx, my)
+
+        def build():
+            self.screen.blit(R.get_image("bg_credits"), (0, 0))
+            self.screen.blit(R.get_overlay((SCREEN_WIDTH, SCREEN_HEIGHT), WHITE, 120), (0, 0))
 
-        pygame.draw.rect(self.screen, (235, 235, 235), story_rect, border_radius=16)
-        pygame.draw.rect(self.screen, (235, 235, 235), endless_rect, border_radius=16)
-        pygame.draw.rect(self.screen, BLACK, story_rect, 3, border_radius=16)
-        pygame.draw.rect(self.screen, BLACK, endless_rect, 3, border_radius=16)
+            pygame.draw.rect(self.screen, (235, 235, 235), story_rect, border_radius=16)
+            pygame.draw.rect(self.screen, (235, 235, 235), endless_rect, border_radius=16)
+            pygame.draw.rect(self.screen, BLACK, story_rect, 3, border_radius=16)
+            pygame.draw.rect(self.screen, BLACK, endless_rect, 3, border_radius=16)
 
-        if story_rect.collidepoint(mx, my):
-            pygame.draw.rect(self.screen, HOVER_COLOR, story_rect, 4, border_radius=16)
-        if endless_rect.collidepoint(mx, my):
-            pygame.draw.rect(self.screen, HOVER_COLOR, endless_rect, 4, border_radius=16)
+            if story_hover:
+                pygame.draw.rect(self.screen, HOVER_COLOR, story_rect, 4, border_radius=16)
+            if endless_hover:
+                pygame.draw.rect(self.screen, HOVER_COLOR, endless_rect, 4, border_radius=16)
 
-        self.draw_text("STORY MODE", story_rect.centerx - 140, story_rect.centery - 20, "title", BLACK)
-        self.draw_text("ENDLESS MODE", endless_rect.centerx - 170, endless_rect.centery - 20, "title", BLACK)
+            self.draw_text("STORY MODE", story_rect.centerx - 140, story_rect.centery - 20, "title", BLACK)
+            self.draw_text("ENDLESS MODE", endless_rect.centerx - 170, endless_rect.centery - 20, "title", BLACK)
+
+        self.static_layer("MODE_SELECT", (story_hover, endless_hover), build)
 
         for e in events:
             if e.type == pygame.MOUSEBUTTONUP and e.button == 1:
@@ -66,9 +68,7 @@ class GameMenuMixin:
 
     def update_story(self, events):
         self.screen.blit(R.get_image("bg_credits"), (0, 0))
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-        overlay.fill((255, 255, 255, 230))
-        self.screen.blit(overlay, (0, 0))
+        self.screen.blit(R.get_overlay((SCREEN_WIDTH, SCREEN_HEIGHT), WHITE, 230), (0, 0))
 
         text = self.story_texts.get(self.story_active_key, "")
 
@@ -106,7 +106,6 @@ class GameMenuMixin:
                     self.story_error_played = True
 
     def update_main_menu(self, events):
-        self.screen.blit(R.get_image("bg_main"), (0, 0))
         mx, my = pygame.mouse.get_pos()
 
         btn_start = pygame.Rect(90, 310, 350, 100)
@@ -115,54 +114,65 @@ class GameMenuMixin:
         btn_quit = pygame.Rect(95, 590, 515, 85)
         btn_credits = pygame.Rect(95, 740, 405, 85)
 
-        if btn_start.collidepoint(mx, my):
-            self.screen.blit(R.get_image("hl_start"), (0, 0))
-            if self.mouse_ready() and pygame.mouse.get_pressed()[0]:
+        hovered = None
+        for name, rect in (("start", btn_start), ("load", btn_load), ("options", btn_options), ("quit", btn_quit), ("credits", btn_credits)):
+            if rect.collidepoint(mx, my):
+                hovered = name
+                break
+
+        def build():
+            self.screen.blit(R.get_image("bg_main"), (0, 0))
+            if hovered == "start":
+                self.screen.blit(R.get_image("hl_start"), (0, 0))
+            elif hovered == "load":
+                self.screen.blit(R.get_image("hl_save"), (0, 0))
+            elif hovered == "quit":
+                self.screen.blit(R.get_image("hl_quit"), (0, 0))
+            elif hovered == "credits":
+                self.screen.blit(R.get_image("hl_credits"), (0, 0))
+
+            if hovered == "options":
+                pygame.draw.rect(self.screen, (240, 240, 240), btn_options, border_radius=8)
+                pygame.draw.rect(self.screen, BLACK, btn_options, 3, border_radius=8)
+            else:
+                # Render options button when not hovered to keep it visible.
+                pygame.draw.rect(self.screen, (220, 220, 220), btn_options, border_radius=8)
+                pygame.draw.rect(self.screen, (60, 60, 60), btn_options, 2, border_radius=8)
+            self.draw_text("OPTIONS", btn_options.centerx, btn_options.centery, "title", BLACK, center=True)
+
+            if self.has_suspended:
+                self.draw_text("Press C to continue the suspended battle", 95, 860, "default", BLACK)
+
+        self.static_layer("MAIN_MENU", (hovered, self.has_suspended), build)
+
+        if hovered is not None and self.mouse_ready() and pygame.mouse.get_pressed()[0]:
+            if hovered == "start":
                 self.state = "MODE_SELECT"
-        elif btn_load.collidepoint(mx, my):
-            self.screen.blit(R.get_image("hl_save"), (0, 0))
-            if self.mouse_ready() and pygame.mouse.get_pressed()[0]:
+            elif hovered == "load":
                 self.archive_mode = "main"
                 self.archive_message = ""
                 self.state = "ARCHIVE"
-        elif btn_options.collidepoint(mx, my):
-            pygame.draw.rect(self.screen, (240, 240, 240), btn_options, border_radius=8)
-            pygame.draw.rect(self.screen, BLACK, btn_options, 3, border_radius=8)
-            self.draw_text("OPTIONS", btn_options.centerx, btn_options.centery, "title", BLACK, center=True)
-            if self.mouse_ready() and pygame.mouse.get_pressed()[0]:
+            elif hovered == "options":
                 self.state = "OPTIONS"
-        elif btn_quit.collidepoint(mx, my):
-            self.screen.blit(R.get_image("hl_quit"), (0, 0))
-            if self.mouse_ready() and pygame.mouse.get_pressed()[0]:
+            elif hovered == "quit":
                 self.running = False
-        elif btn_credits.collidepoint(mx, my):
-            self.screen.blit(R.get_image("hl_credits"), (0, 0))
-            if self.mouse_ready() and pygame.mouse.get_pressed()[0]:
+            elif hovered == "credits":
                 self.credits_page = 0
                 self.state = "CREDITS"
 
-        # Render options button when not hovered to keep it visible.
-        if not btn_options.collidepoint(mx, my):
-            pygame.draw.rect(self.screen, (220, 220, 220), btn_options, border_radius=8)
-            pygame.draw.rect(self.screen, (60, 60, 60), btn_options, 2, border_radius=8)
-            self.draw_text("OPTIONS", btn_options.centerx, btn_options.centery, "title", BLACK, center=True)
+        if self.has_suspended:
+            for e in events:
+                if e.type == pygame.KEYDOWN and e.key == pygame.K_c:
+                    self.resume_suspended()
+                    break
 
     def update_options(self, events):
-        self.screen.blit(R.get_image("bg_credits"), (0, 0))
-
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-        overlay.fill((255, 255, 255, 230))
-        self.screen.blit(overlay, (0, 0))
-
         panel = pygame.Rect(380, 180, 840, 500)
-        pygame.draw.rect(self.screen, (245, 245, 245), panel, border_radius=12)
-        pygame.draw.rect(self.screen, (70, 70, 70), panel, 3, border_radius=12)
-
-        self.draw_text("OPTIONS", panel.centerx - 70, panel.top + 30, "title", BLACK)
-        self.draw_text("Click the bar to set volume", panel.centerx - 170, panel.top + 90, "default", BLACK)
+        music_pos = (panel.left + 120, panel.top + 140)
+        sfx_pos = (panel.left + 120, panel.top + 230)
 
         music_val = self.settings.get("music_volume", 0.1)
-        new_music, music_changed = self.render_slider("Music Volume", music_val, panel.left + 120, panel.top + 140, events)
+        new_music, music_changed = self.slider_input(music_val, *music_pos, events)
         if music_changed:
             self.settings["music_volume"] = new_music
             try:
@@ -172,7 +182,7 @@ class GameMenuMixin:
             self.options_dirty = True
 
         sfx_val = self.settings.get("sfx_volume", 1.0)
-        new_sfx, sfx_changed = self.render_slider("SFX Volume", sfx_val, panel.left + 120, panel.top + 230, events)
+        new_sfx, sfx_changed = self.slider_input(sfx_val, *sfx_pos, events)
         if sfx_changed:
             self.settings["sfx_volume"] = new_sfx
             self.sfx_channel.set_volume(new_sfx)
@@ -180,13 +190,30 @@ class GameMenuMixin:
             self.options_dirty = True
 
         back_rect = pygame.Rect(panel.centerx - 120, panel.bottom - 120, 240, 70)
-        pygame.draw.rect(self.screen, (220, 220, 220), back_rect, border_radius=10)
-        pygame.draw.rect(self.screen, BLACK, back_rect, 2, border_radius=10)
-        self.draw_text("BACK", back_rect.centerx, back_rect.centery, "title", BLACK, center=True)
-
         mx, my = pygame.mouse.get_pos()
-        if back_rect.collidepoint(mx, my):
-            pygame.draw.rect(self.screen, HOVER_COLOR, back_rect, 3, border_radius=10)
+        back_hover = back_rect.collidepoint(mx, my)
+
+        def build():
+            self.screen.blit(R.get_image("bg_credits"), (0, 0))
+            self.screen.blit(R.get_overlay((SCREEN_WIDTH, SCREEN_HEIGHT), WHITE, 230), (0, 0))
+
+            pygame.draw.rect(self.screen, (245, 245, 245), panel, border_radius=12)
+            pygame.draw.rect(self.screen, (70, 70, 70), panel, 3, border_radius=12)
+
+            self.draw_text("OPTIONS", panel.centerx - 70, panel.top + 30, "title", BLACK)
+            self.draw_text("Click the bar to set volume", panel.centerx - 170, panel.top + 90, "default", BLACK)
+            self.draw_slider("Music Volume", new_music, *music_pos)
+            self.draw_slider("SFX Volume", new_sfx, *sfx_pos)
+
+            pygame.draw.rect(self.screen, (220, 220, 220), back_rect, border_radius=10)
+            pygame.draw.rect(self.screen, BLACK, back_rect, 2, border_radius=10)
+            self.draw_text("BACK", back_rect.centerx, back_rect.centery, "title", BLACK, center=True)
+            if back_hover:
+                pygame.draw.rect(self.screen, HOVER_COLOR, back_rect, 3, border_radius=10)
+
+        self.static_layer("OPTIONS", (new_music, new_sfx, back_hover), build)
+
+        if back_hover:
             for e in events:
                 if e.type == pygame.MOUSEBUTTONDOWN and e.button == 1:
                     self.leave_options()
@@ -203,7 +230,6 @@ class GameMenuMixin:
         self.state = "MAIN_MENU"
 
     def update_level_select(self, events):
-        self.screen.blit(R.get_image("bg_credits"), (0, 0))
         mx, my = pygame.mouse.get_pos()
 
         processed_click = False
@@ -211,6 +237,9 @@ class GameMenuMixin:
             if e.type == pygame.MOUSEBUTTONUP:
                 processed_click = True
 
+        unlocked = self.save_data["unlocked"]
+        buttons = []
+        hovered = None
         for lvl in self.levels:
             lid = lvl["id"]
             rect = self.level_buttons.get(lid)
@@ -219,103 +248,118 @@ class GameMenuMixin:
 
             theme = str(lvl["theme"])
             idx = int(lid.split("-")[1])
-            unlocked_upto = self.save_data["unlocked"].get(theme, 1)
+            unlocked_upto = unlocked.get(theme, 1)
             is_unlocked = self.debug_mode or idx <= unlocked_upto
-
-            pygame.draw.rect(self.screen, (30, 30, 30), rect, 2)
-            self.draw_text(lid, rect.x + 20, rect.y + 30, "default", BLACK)
-
-            if is_unlocked:
-                if rect.collidepoint(mx, my):
-                    hover = pygame.transform.smoothscale(R.get_image("level_hover"), (200, 90))
-                    self.screen.blit(hover, rect)
-                    if processed_click and rect.collidepoint(mx, my):
-                        self.selected_level = lvl
-                        self.selected_plants_indices = []
-                        if lid == "1-1" and not self.story_shown["1-1"]:
-                            self.start_story("1-1", "PLANT_SELECT")
-                        elif lid == "2-1" and not self.story_shown["2-1"]:
-                            self.start_story("2-1", "PLANT_SELECT")
-                        else:
-                            self.state = "PLANT_SELECT"
+            buttons.append((lid, rect, is_unlocked))
+            if is_unlocked and rect.collidepoint(mx, my):
+                hovered = lvl
+
+        def build():
+            self.screen.blit(R.get_image("bg_credits"), (0, 0))
+            for lid, rect, is_unlocked in buttons:
+                pygame.draw.rect(self.screen, (30, 30, 30), rect, 2)
+                self.draw_text(lid, rect.x + 20, rect.y + 30, "default", BLACK)
+                if not is_unlocked:
+                    self.screen.blit(R.get_overlay((200, 90), BLACK, 150), rect)
+                elif hovered is not None and lid == hovered["id"]:
+                    self.screen.blit(R.get_scaled("level_hover", (200, 90)), rect)
+
+        key = (hovered and hovered["id"], tuple(is_unlocked for _, _, is_unlocked in buttons))
+        self.static_layer("LEVEL_SELECT", key, build)
+
+        if hovered is not None and processed_click:
+            lid = hovered["id"]
+            self.selected_level = hovered
+            self.selected_plants_indices = []
+            if lid == "1-1" and not self.story_shown["1-1"]:
+                self.start_story("1-1", "PLANT_SELECT")
+            elif lid == "2-1" and not self.story_shown["2-1"]:
+                self.start_story("2-1", "PLANT_SELECT")
             else:
-                shade = pygame.Surface((200, 90))
-                shade.fill(BLACK)
-                shade.set_alpha(150)
-                self.screen.blit(shade, rect)
+                self.state = "PLANT_SELECT"
 
         for e in events:
             if e.type == pygame.KEYDOWN and e.key == pygame.K_ESCAPE:
                 self.state = "MAIN_MENU"
 
     def update_plant_select(self, events):
-        self.screen.blit(R.get_image("bg_credits"), (0, 0))
-
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-        overlay.fill((255, 255, 255, 220))
-        self.screen.blit(overlay, (0, 0))
-
         panel_rect = pygame.Rect(
             SELECT_START_X - 30,
             SELECT_START_Y - 30,
             SELECT_GAP_X * 3 + SELECT_SLOT_SIZE + 60,
             SELECT_GAP_Y * 3 + SELECT_SLOT_SIZE + 100,
         )
-        pygame.draw.rect(self.screen, (50, 50, 50), panel_rect, 5, border_radius=15)
-        self.draw_text("CHOOSE YOUR IDES", panel_rect.centerx - 230, panel_rect.top - 45, "title", BLACK)
-
         mx, my = pygame.mouse.get_pos()
-        hovered_plant_idx = -1
-        available = [i for i in range(16) if i not in self.selected_plants_indices]
-        _ = available
+        selected = tuple(self.selected_plants_indices)
 
+        hovered_plant_idx = -1
         for idx in range(16):
-            if idx in self.selected_plants_indices:
-                continue
+            if idx not in selected and self.plant_select_rects[idx].collidepoint(mx, my):
+                hovered_plant_idx = idx
+                break
+        sel_rects = [pygame.Rect(100 + i * 110, 75, 90, 90) for i in range(len(selected))]
+        hovered_sel = next((i for i, r in enumerate(sel_rects) if r.collidepoint(mx, my)), -1)
+        ok_hover = self.ok_button.collidepoint(mx, my)
 
-            slot_rect = self.plant_select_rects[idx]
-            pygame.draw.rect(self.screen, (200, 200, 200), slot_rect, border_radius=5)
-            pygame.draw.rect(self.screen, (80, 80, 80), slot_rect, 2, border_radius=5)
+        def build():
+            self.screen.blit(R.get_image("bg_credits"), (0, 0))
+            self.screen.blit(R.get_overlay((SCREEN_WIDTH, SCREEN_HEIGHT), WHITE, 220), (0, 0))
 
-            img = R.get_image(f"idle_{idx+1}withcost")
-            img_rect = img.get_rect(center=slot_rect.center)
-            self.screen.blit(img, img_rect)
+            pygame.draw.rect(self.screen, (50, 50, 50), panel_rect, 5, border_radius=15)
+            self.draw_text("CHOOSE YOUR IDES", panel_rect.centerx - 230, panel_rect.top - 45, "title", BLACK)
 
-            if slot_rect.collidepoint(mx, my):
-                pygame.draw.rect(self.screen, HOVER_COLOR, slot_rect, 3, border_radius=5)
-                hovered_plant_idx = idx
-                for e in events:
-                    if e.type == pygame.MOUSEBUTTONUP:
-                        if len(self.selected_plants_indices) < 10:
-                            self.selected_plants_indices.append(idx)
-
-        for i, p_idx in enumerate(self.selected_plants_indices):
-            x, y = 100 + i * 110, 75
-            sel_rect = pygame.Rect(x, y, 90, 90)
-
-            pygame.draw.rect(self.screen, (230, 230, 255), sel_rect, border_radius=5)
-            pygame.draw.rect(self.screen, BLACK, sel_rect, 2, border_radius=5)
-
-            img = R.get_image(f"idle_{p_idx+1}withcost")
-            ir = img.get_rect(center=sel_rect.center)
-            self.screen.blit(img, ir)
-
-            if sel_rect.collidepoint(mx, my):
-                pygame.draw.rect(self.screen, RED, sel_rect, 3, border_radius=5)
-                for e in events:
-                    if e.type == pygame.MOUSEBUTTONUP:
-                        self.selected_plants_indices.pop(i)
-                        break
-
-        pygame.draw.rect(self.screen, BLACK, self.ok_button, 3)
-        self.draw_text("OK!!", self.ok_button.x + 30, self.ok_button.y + 20, "default", BLACK)
-
-        if self.ok_button.collidepoint(mx, my):
-            pygame.draw.rect(self.screen, HOVER_COLOR, self.ok_button, 3)
+            for idx in range(16):
+                if idx in selected:
+                    continue
+
+                slot_rect = self.plant_select_rects[idx]
+                pygame.draw.rect(self.screen, (200, 200, 200), slot_rect, border_radius=5)
+                pygame.draw.rect(self.screen, (80, 80, 80), slot_rect, 2, border_radius=5)
+
+                img = R.get_image(f"idle_{idx+1}withcost")
+                img_rect = img.get_rect(center=slot_rect.center)
+                self.screen.blit(img, img_rect)
+
+                if idx == hovered_plant_idx:
+                    pygame.draw.rect(self.screen, HOVER_COLOR, slot_rect, 3, border_radius=5)
+
+            for i, p_idx in enumerate(selected):
+                sel_rect = sel_rects[i]
+                pygame.draw.rect(self.screen, (230, 230, 255), sel_rect, border_radius=5)
+                pygame.draw.rect(self.screen, BLACK, sel_rect, 2, border_radius=5)
+
+                img = R.get_image(f"idle_{p_idx+1}withcost")
+                ir = img.get_rect(center=sel_rect.center)
+                self.screen.blit(img, ir)
+
+                if i == hovered_sel:
+                    pygame.draw.rect(self.screen, RED, sel_rect, 3, border_radius=5)
+
+            pygame.draw.rect(self.screen, BLACK, self.ok_button, 3)
+            self.draw_text("OK!!", self.ok_button.x + 30, self.ok_button.y + 20, "default", BLACK)
+            if ok_hover:
+                pygame.draw.rect(self.screen, HOVER_COLOR, self.ok_button, 3)
+
+        self.static_layer("PLANT_SELECT", (selected, hovered_plant_idx, hovered_sel, ok_hover), build)
+
+        if hovered_plant_idx != -1:
+            for e in events:
+                if e.type == pygame.MOUSEBUTTONUP:
+                    if len(self.selected_plants_indices) < 10:
+                        self.selected_plants_indices.append(hovered_plant_idx)
+
+        if hovered_sel != -1:
+            for e in events:
+                if e.type == pygame.MOUSEBUTTONUP:
+                    self.selected_plants_indices.pop(hovered_sel)
+                    break
+
+        if ok_hover:
             for e in events:
                 if e.type == pygame.MOUSEBUTTONUP and len(self.selected_plants_indices) > 0:
                     self.start_game()
 
+        # The tooltip follows the mouse, so it is drawn over the layer.
         if hovered_plant_idx != -1:
             stats = PLANT_STATS[hovered_plant_idx]
             tip_w, tip_h = 300, 120
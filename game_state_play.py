@@ -1,5 +1,8 @@
+import os
+import time
 import pygame
 from constants import (
+    BATTLE_BACKEND,
     BLACK,
     CELL_HEIGHT,
     CELL_WIDTH,
@@ -7,38 +10,96 @@ from constants import (
     GRID_ROWS,
     GRID_START_X,
     GRID_START_Y,
+    MAX_SIM_STEPS,
     PLANT_STATS,
     RED,
+    REPLAY_DIR,
     SCREEN_HEIGHT,
     SCREEN_WIDTH,
+    SIM_DT,
+    SUSPEND_PATH,
     WHITE,
+    WIN_ZOOM_END,
+    WIN_ZOOM_START,
 )
-from entities import Enemy, Plant
+from game_common import GUIDANCE_RECT
+from render import blit_at, text_at
+from replay import save_replay
 from resources import R
 from save_manager import SaveManager
-from waves import EndlessWaveManager, WaveManager, compute_level_difficulty, starting_money_for_level
+from snapshot import capture, restore
+from vector_battle import create_battle
+
+
+def slot_cell(p_idx, slot_rect, mask_h, poor):
+    # Card icon, cooldown shade (mask_h px from the bottom) and the no-money tag.
+    def draw(surface):
+        rect = surface.blit(R.get_image(f"idle_{p_idx+1}withcost"), slot_rect.topleft)
+        if mask_h:
+            mask = R.get_overlay((100, 100), BLACK, 150)
+            rect.union_ip(surface.blit(mask, (slot_rect.x, slot_rect.y + (100 - mask_h)), (0, 0, 100, mask_h)))
+        if poor:
+            rect.union_ip(surface.blit(R.get_image("no_money"), (slot_rect.x, slot_rect.y + 5)))
+        return rect
+    return draw
+
+
+def tooltip_at(box, lines):
+    def draw(surface):
+        # Fills, not draw.rect(width=2): this is also redrawn under a clip,
+        # and a clipped outline lands on the clip edge.
+        surface.fill(BLACK, box)
+        surface.fill((240, 240, 240), box.inflate(-4, -4))
+        for surf, pos in lines:
+            surface.blit(surf, pos)
+        return box
+    return draw
 
 
 class GamePlayMixin:
     def start_game(self):
         self.state = "GAMING"
-        if self.game_mode == "ENDLESS":
-            if not self.selected_level:
-                self.selected_level = {"id": "ENDLESS", "theme": 1, "d": 0.4, "final": False}
-            difficulty = 1.0
-            self.money = starting_money_for_level(self.selected_level)
-        else:
-            difficulty = compute_level_difficulty(self.selected_level)
-            self.money = starting_money_for_level(self.selected_level)
-        self.plants.empty()
-        self.enemies.empty()
-        self.bullets.empty()
-        if self.game_mode == "ENDLESS":
-            self.wave_manager = EndlessWaveManager(difficulty=difficulty)
-        else:
-            self.wave_manager = WaveManager(self.selected_level, difficulty)
+        if self.game_mode == "ENDLESS" and not self.selected_level:
+            self.selected_level = {"id": "ENDLESS", "theme": 1, "d": 0.4, "final": False}
+        self.enter_battle(
+            create_battle(
+                self.selected_level,
+                self.game_mode,
+                self.selected_plants_indices,
+                spawn_delay=self.spawn_delay,
+                warning_time=self.warning_time,
+                backend=BATTLE_BACKEND,
+            )
+        )
+
+    def resume_suspended(self):
+        # The bytes suspended this session are still in memory (the file may
+        # not be written yet); the file only matters after a restart.
+        data = self.suspended_snapshot
+        try:
+            if data is None:
+                with open(SUSPEND_PATH, "rb") as f:
+                    data = f.read()
+            battle = restore(data)
+        except Exception as e:
+            print(f"Error loading suspended battle: {e}")
+            return
+        # One-shot, but only once it has loaded: a failed resume keeps the file.
+        SaveManager.delete(SUSPEND_PATH)
+        self.suspended_snapshot = None
+        self.has_suspended = False
+        self.selected_level = battle.level
+        self.game_mode = battle.mode
+        self.selected_plants_indices = list(battle.selected_plants)
+        self.state = "GAMING"
+        self.enter_battle(battle)
+
+    def enter_battle(self, battle):
+        self.battle = battle
+        self.battle_checkpoint = None
         now = pygame.time.get_ticks()
-        self.game_start_tick = now
+        self.battle_last_tick = now
+        self.sim_accumulator = 0
         self.guidance_show_until = now + 20000
         self.guidance_force_hide = False
         self.lose_transition_start = None
@@ -47,112 +108,94 @@ class GamePlayMixin:
         self.lose_enemy_img_key = None
         self.lose_cam_offset = 0
         self.lose_enemy_id = None
-        self.enemies_killed = 0
+        self.lose_world = None
+        self.lose_final_frame = None
         self.win_sound_played = False
 
-        self.plant_cd_status = {}
-        for idx in self.selected_plants_indices:
-            self.plant_cd_status[idx] = -99999
+    def save_battle_replay(self):
+        battle = self.battle
+        level_id = str(battle.level.get("id", "level"))
+        name = f"{time.strftime('%Y%m%d_%H%M%S')}_{level_id}_{battle.outcome or 'QUIT'}.vsrp"
+        save_replay(os.path.join(REPLAY_DIR, name), battle)
 
     def update_gaming(self, events):
         now = pygame.time.get_ticks()
-        elapsed = now - self.game_start_tick
+        battle = self.battle
+        self.sim_accumulator += (now - self.battle_last_tick) * self.sim_time_scale
+        self.battle_last_tick = now
+        outcome = None
+        steps = 0
+        while self.sim_accumulator >= SIM_DT and outcome is None:
+            if steps >= MAX_SIM_STEPS:
+                # Too far behind: drop the backlog instead of spiralling.
+                self.sim_accumulator %= SIM_DT
+                break
+            outcome = battle.step(SIM_DT)
+            self.sim_accumulator -= SIM_DT
+            steps += 1
+        alpha = min(1.0, self.sim_accumulator / SIM_DT)
+        elapsed = battle.time
 
-        self.screen.fill(BLACK)
+        if self.selected_level.get("final") and battle.wave_manager.finished_spawning:
+            # The win zoom is close: scale one frame of it per battle frame
+            # now, so the WIN transition has nothing left to scale.
+            R.bake_zoom("img_win_final", WIN_ZOOM_START, WIN_ZOOM_END, (SCREEN_WIDTH, SCREEN_HEIGHT), limit=1)
 
         bg = R.get_image("bg_game2") if self.selected_level["theme"] == 2 else R.get_image("bg_game1")
-        self.screen.blit(bg, (0, 0))
-
-        if elapsed > self.spawn_delay:
-            spawns = self.wave_manager.update(now)
-            for (e_id, row) in spawns:
-                self.enemies.add(Enemy(e_id, row))
-
-        if now % 1000 < 20:
-            pass
-
-        self.plants.update(now, self.enemies, self.bullets, game_ref=self)
-        self.bullets.update()
-        self.enemies.update(self.plants)
-
-        hits = pygame.sprite.groupcollide(self.enemies, self.bullets, False, False)
-        for enemy, hit_bullets in hits.items():
-            if not enemy.alive():
-                continue
-
-            total_damage = 0
-            for b in hit_bullets:
-                total_damage += b.damage
-                b.kill()
-
-            enemy.hp -= total_damage
-
-            if enemy.hp <= 0 and enemy.alive():
-                enemy.kill()
-                self.money += enemy.reward
-                self.enemies_killed += 1
-
-        for enemy in list(self.enemies):
-            if enemy.hp <= 0 and enemy.alive():
-                enemy.kill()
-                self.money += enemy.reward
-                self.enemies_killed += 1
-
-        if self.wave_manager and self.game_mode != "ENDLESS":
-            spawning_done = self.wave_manager.finished_spawning
-
-            if spawning_done:
-                for e in list(self.enemies):
-                    if e.rect.x >= SCREEN_WIDTH:
-                        e.kill()
-
-            alive = len(self.enemies)
-
-            if self.debug_mode:
-                if now - self.last_debug_log > 1000:
-                    self.last_debug_log = now
-                    print(f"DEBUG WIN CHECK -> alive: {alive}, spawning_done: {spawning_done}")
-                    for e in self.enemies:
-                        print(f"  Enemy id={e.id} row={e.row} x={e.rect.x} hp={e.hp} frozen={e.frozen}")
-                self.draw_text(f"Alive: {alive} | Spawning Done: {spawning_done}", 20, 210, "default", BLACK)
-
-            if spawning_done and alive == 0:
-                if self.selected_level and self.selected_level.get("final") and not self.story_shown["final"]:
-                    self.start_story("final", "WIN")
-                else:
-                    self.play_sfx("win", 1.0)
-                    self.state = "WIN"
-                return
-
-        for e in list(self.enemies):
-            if e.rect.x > SCREEN_WIDTH + 200 or e.rect.x < -200:
-                e.kill()
-            elif e.hp <= 0:
-                e.kill()
-
-        for e in self.enemies:
-            if e.rect.x < 200:
-                self.state = "LOSE"
-                self.lose_sound_sequence = ["error1"] * 5 + ["error"]
-                self.lose_sound_index = 0
-                self.lose_sound_active = True
-                self.lose_transition_start = pygame.time.get_ticks()
-                self.lose_cam_offset = 0
-                self.lose_enemy_start = (e.rect.centerx, e.rect.centery)
-                self.lose_enemy_pos = list(self.lose_enemy_start)
-                self.lose_enemy_img_key = f"enemy_{e.id+1}"
-                self.lose_enemy_id = e.id
-                if self.lose_sound_channel:
-                    self.lose_sound_channel.stop()
-                return
-
-        self.draw_text(str(self.money), 90, 100, "default", BLACK)
-
-        if self.game_mode == "ENDLESS" and self.wave_manager and getattr(self.wave_manager, "wave_started_ts", 0):
-            wave_ts = self.wave_manager.wave_started_ts
-            if now - wave_ts < 2500:
-                wave_num = getattr(self.wave_manager, "wave_index", 1)
-                self.draw_text(f"wave {wave_num}", SCREEN_WIDTH // 2 - 60, 140, "title", RED)
+        renderer = self.gaming_renderer
+        # Plants only change when the lane index does; they live in the
+        # renderer's scene instead of being redrawn every frame.
+        renderer.begin(bg, self.frame_count, (battle.lanes, battle.lanes.version), battle.plants)
+
+        debug_text = None
+        if self.debug_mode and self.game_mode != "ENDLESS":
+            spawning_done = battle.wave_manager.finished_spawning
+            alive = len(battle.enemies)
+            if now - self.last_debug_log > 1000:
+                self.last_debug_log = now
+                print(f"DEBUG WIN CHECK -> alive: {alive}, spawning_done: {spawning_done}")
+                for e in battle.enemies:
+                    print(f"  Enemy id={e.id} row={e.row} x={e.rect.x} hp={e.hp} frozen={e.frozen}")
+            debug_text = f"Alive: {alive} | Spawning Done: {spawning_done}"
+        renderer.cell("debug", debug_text, text_at(debug_text, 20, 210, "default", BLACK))
+
+        if outcome is not None:
+            self.save_battle_replay()
+
+        if outcome == "WIN":
+            if self.selected_level and self.selected_level.get("final") and not self.story_shown["final"]:
+                self.start_story("final", "WIN")
+            else:
+                self.play_sfx("win", 1.0)
+                self.state = "WIN"
+            return
+
+        if outcome == "LOSE":
+            R.scaled.discard("img_win_final")
+            e = battle.lose_enemy
+            self.state = "LOSE"
+            self.lose_sound_sequence = ["error1"] * 5 + ["error"]
+            self.lose_sound_index = 0
+            self.lose_sound_active = True
+            self.lose_transition_start = pygame.time.get_ticks()
+            self.lose_cam_offset = 0
+            self.lose_enemy_start = (e.rect.centerx, e.rect.centery)
+            self.lose_enemy_pos = list(self.lose_enemy_start)
+            self.lose_enemy_img_key = f"enemy_{e.id+1}"
+            self.lose_enemy_id = e.id
+            if self.lose_sound_channel:
+                self.lose_sound_channel.stop()
+            return
+
+        renderer.cell("money", battle.money, text_at(str(battle.money), 90, 100, "default", BLACK))
+
+        wave_text = None
+        if self.game_mode == "ENDLESS" and getattr(battle.wave_manager, "wave_started_ts", 0):
+            wave_ts = battle.wave_manager.wave_started_ts
+            if battle.time - wave_ts < 2500:
+                wave_num = getattr(battle.wave_manager, "wave_index", 1)
+                wave_text = f"wave {wave_num}"
+        renderer.cell("wave", wave_text, text_at(wave_text, SCREEN_WIDTH // 2 - 60, 140, "title", RED))
 
         mx, my = pygame.mouse.get_pos()
 
@@ -162,30 +205,19 @@ class GamePlayMixin:
             if i >= len(self.selected_plants_indices):
                 break
             p_idx = self.selected_plants_indices[i]
-            img = R.get_image(f"idle_{p_idx+1}withcost")
-            self.screen.blit(img, slot_rect.topleft)
-
             stats = PLANT_STATS[p_idx]
-            last_p = self.plant_cd_status.get(p_idx, 0)
-            cd_remain = stats["cooldown"] - (now - last_p)
-            if cd_remain > 0:
-                ratio = cd_remain / stats["cooldown"]
-                h = int(100 * ratio)
-                mask = pygame.Surface((100, h))
-                mask.fill(BLACK)
-                mask.set_alpha(150)
-                self.screen.blit(mask, (slot_rect.x, slot_rect.y + (100 - h)))
-
-            if self.money < stats["cost"]:
-                self.screen.blit(R.get_image("no_money"), (slot_rect.x, slot_rect.y + 5))
+            cd_remain = battle.cooldown_remaining(p_idx)
+            h = int(100 * cd_remain / stats["cooldown"]) if cd_remain > 0 else 0
+            poor = battle.money < stats["cost"]
+            renderer.cell(("slot", i), (p_idx, h, poor), slot_cell(p_idx, slot_rect, h, poor))
 
             if slot_rect.collidepoint(mx, my):
                 if self.mouse_ready() and pygame.mouse.get_pressed()[0] and not self.holding_shovel:
-                    if cd_remain <= 0 and self.money >= stats["cost"]:
+                    if battle.can_place(p_idx):
                         self.holding_plant_idx = i
                 hovered_slot_idx = p_idx
 
-        self.screen.blit(R.get_image("cleaner"), self.shovel_rect)
+        renderer.cell("cleaner", True, blit_at(R.get_image("cleaner"), self.shovel_rect.topleft))
         if self.shovel_rect.collidepoint(mx, my):
             if self.mouse_ready() and pygame.mouse.get_pressed()[0]:
                 self.holding_shovel = True
@@ -202,27 +234,19 @@ class GamePlayMixin:
 
                 if 0 <= r < GRID_ROWS and 0 <= c < GRID_COLS:
                     if self.holding_shovel:
-                        for p in self.plants:
-                            if p.row == r and p.col == c:
-                                p.kill()
-                                self.holding_shovel = False
-                                rm = R.sounds.get("remove")
-                                if rm:
-                                    try:
-                                        self.sfx_channel.play(rm)
-                                    except Exception:
-                                        rm.play()
-                                break
+                        if battle.remove_plant(r, c):
+                            self.holding_shovel = False
+                            rm = R.get_sound("remove")
+                            if rm:
+                                try:
+                                    self.sfx_channel.play(rm)
+                                except Exception:
+                                    rm.play()
                     elif self.holding_plant_idx != -1:
-                        occupied = any(p.row == r and p.col == c for p in self.plants)
-                        if not occupied:
-                            p_idx = self.selected_plants_indices[self.holding_plant_idx]
-                            stats = PLANT_STATS[p_idx]
-                            self.money -= stats["cost"]
-                            self.plants.add(Plant(p_idx, (r, c)))
-                            self.plant_cd_status[p_idx] = now
+                        p_idx = self.selected_plants_indices[self.holding_plant_idx]
+                        if battle.place_plant(p_idx, r, c):
                             self.holding_plant_idx = -1
-                            st = R.sounds.get("set")
+                            st = R.get_sound("set")
                             if st:
                                 try:
                                     self.sfx_channel.play(st)
@@ -231,16 +255,23 @@ class GamePlayMixin:
 
             if e.type == pygame.KEYDOWN and e.key == pygame.K_ESCAPE:
                 self.state = "PAUSE"
+                battle.record("pause")
+            if e.type == pygame.KEYDOWN and e.key == pygame.K_F5:
+                self.battle_checkpoint = capture(battle)
+            if e.type == pygame.KEYDOWN and e.key == pygame.K_F9 and self.battle_checkpoint:
+                # Instant retry: the whole battle, input log included, rolls back.
+                battle = self.battle = restore(self.battle_checkpoint)
+                self.sim_accumulator = 0
             if e.type == pygame.KEYDOWN and e.key == pygame.K_h:
                 self.guidance_force_hide = not self.guidance_force_hide
                 if not self.guidance_force_hide:
                     self.guidance_show_until = max(self.guidance_show_until, now + 12000)
 
-        self.plants.draw(self.screen)
-        self.enemies.draw(self.screen)
-        self.bullets.draw(self.screen)
+        for group in (battle.enemies, battle.bullets):
+            renderer.draw_group(group, alpha)
 
-        self.draw_guidance_overlay(now)
+        if self.guidance_shown(now):
+            renderer.top("guidance", None, GUIDANCE_RECT, lambda screen: self.draw_guidance_overlay())
 
         if hovered_slot_idx is not None:
             stats = PLANT_STATS[hovered_slot_idx]
@@ -252,55 +283,67 @@ class GamePlayMixin:
             if tip_y + tip_h > SCREEN_HEIGHT:
                 tip_y = my - tip_h - 15
 
-            pygame.draw.rect(self.screen, (240, 240, 240), (tip_x, tip_y, tip_w, tip_h))
-            pygame.draw.rect(self.screen, BLACK, (tip_x, tip_y, tip_w, tip_h), 2)
-
-            self.draw_text(stats["name"], tip_x + 10, tip_y + 10, "default", BLACK)
-            self.draw_text(f"Cost: {stats['cost']}", tip_x + 10, tip_y + 40, "default", BLACK)
-            self.draw_text(f"HP: {stats['hp']} Dmg: {stats['damage']}", tip_x + 10, tip_y + 65, "default", BLACK)
-            self.draw_text(stats["desc"], tip_x + 10, tip_y + 90, "default", (50, 50, 50))
-
-        if self.warning_time < elapsed < self.spawn_delay:
+            box = pygame.Rect(tip_x, tip_y, tip_w, tip_h)
+            lines = [
+                (R.render_text(stats["name"], "default", BLACK), (tip_x + 10, tip_y + 10)),
+                (R.render_text(f"Cost: {stats['cost']}", "default", BLACK), (tip_x + 10, tip_y + 40)),
+                (R.render_text(f"HP: {stats['hp']} Dmg: {stats['damage']}", "default", BLACK), (tip_x + 10, tip_y + 65)),
+                (R.render_text(stats["desc"], "default", (50, 50, 50)), (tip_x + 10, tip_y + 90)),
+            ]
+            rect = box.unionall([surf.get_rect(topleft=pos) for surf, pos in lines])
+            renderer.top("tooltip", hovered_slot_idx, rect, tooltip_at(box, lines))
+
+        if battle.warning_time < elapsed < battle.spawn_delay:
             if (elapsed // 200) % 2 == 0:
-                txt = "YOUR BUGS ARE COMING!!!"
-                font = R.fonts.get("warning", pygame.font.SysFont(None, 120))
-                surf = font.render(txt, True, RED)
+                surf = R.render_text("YOUR BUGS ARE COMING!!!", "warning", RED)
                 rect = surf.get_rect(center=(800, 280))
-                self.screen.blit(surf, rect)
+                renderer.top("warning", None, rect, blit_at(surf, rect.topleft))
 
+        held = None
         if self.holding_plant_idx != -1:
             p_idx = self.selected_plants_indices[self.holding_plant_idx]
-            img = R.get_image(f"idle_{p_idx+1}withcost")
-            self.screen.blit(img, (mx - 50, my - 50))
+            held = R.get_image(f"idle_{p_idx+1}withcost")
         elif self.holding_shovel:
-            self.screen.blit(R.get_image("cleaner"), (mx - 50, my - 50))
-
-    def update_pause(self, events):
-        darkness = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-        darkness.fill(BLACK)
-        darkness.set_alpha(150)
-        self.screen.blit(darkness, (0, 0))
-
+            held = R.get_image("cleaner")
+        if held is not None:
+            pos = (mx - 50, my - 50)
+            renderer.top("held", held, held.get_rect(topleft=pos), blit_at(held, pos))
+
+        self.dirty_rects = renderer.end()
+
+    def freeze_pause_frame(self):
+        # The screen holds the last battle frame: dim it and add the pause
+        # card once, then every pause frame is this one blit. Game.run calls
+        # this right after the frame that paused, before any debug overlay.
+        self.screen.blit(R.get_overlay((SCREEN_WIDTH, SCREEN_HEIGHT), BLACK, 150), (0, 0))
         p_img = R.get_image("bg_pause")
         p_rect = p_img.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
         self.screen.blit(p_img, p_rect)
+        self.pause_frame = R.track_surface(self.screen.copy())
 
-        if not hasattr(self, "pause_start_ts"):
-            self.pause_start_ts = pygame.time.get_ticks()
+    def update_pause(self, events):
+        if self.pause_frame is None:
+            self.freeze_pause_frame()
+        else:
+            self.screen.blit(self.pause_frame, (0, 0))
 
         for e in events:
             if e.type == pygame.KEYDOWN:
+                if e.key in (pygame.K_RETURN, pygame.K_ESCAPE):
+                    self.pause_frame = None
                 if e.key == pygame.K_RETURN:
+                    # The battle clock does not advance while paused.
                     self.state = "GAMING"
-                    pause_duration = pygame.time.get_ticks() - self.pause_start_ts
-                    self.game_start_tick += pause_duration
-                    for idx in self.plant_cd_status:
-                        self.plant_cd_status[idx] += pause_duration
-                    delattr(self, "pause_start_ts")
+                    self.battle_last_tick = pygame.time.get_ticks()
+                    self.battle.record("resume")
                 elif e.key == pygame.K_ESCAPE:
                     self.state = "MAIN_MENU"
-                    if hasattr(self, "pause_start_ts"):
-                        delattr(self, "pause_start_ts")
+                    R.scaled.discard("img_win_final")
+                    self.battle.record("quit")
+                    self.save_battle_replay()
+                    self.suspended_snapshot = capture(self.battle)
+                    SaveManager.write(SUSPEND_PATH, self.suspended_snapshot)
+                    self.has_suspended = True
 
     def update_win(self, events):
         if self.selected_level.get("final") and not getattr(self, "win_sound_played", False):
@@ -309,24 +352,18 @@ class GamePlayMixin:
         if self.selected_level["final"]:
             if self.win_anim_start is None:
                 self.win_anim_start = pygame.time.get_ticks()
-            img = R.get_image("img_win_final")
             elapsed = pygame.time.get_ticks() - self.win_anim_start
             duration = 800
             t = min(1.0, elapsed / duration)
-            start_scale = 0.25
-            end_scale = 1.05
-            scale = start_scale + (end_scale - start_scale) * t
-            target_w = int(SCREEN_WIDTH * scale)
-            target_h = int(SCREEN_HEIGHT * scale)
-            scaled = pygame.transform.smoothscale(img, (target_w, target_h))
+            # Frames were baked during the last wave; any missing one is
+            # scaled here on first use.
+            scale = WIN_ZOOM_START + (WIN_ZOOM_END - WIN_ZOOM_START) * t
+            scaled = R.get_zoom_frame("img_win_final", scale, (SCREEN_WIDTH, SCREEN_HEIGHT))
             rect = scaled.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
             self.screen.blit(scaled, rect)
             self.draw_text("按任意键返回选关", 650, 820, "default", BLACK)
         else:
-            overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-            overlay.fill(WHITE)
-            overlay.set_alpha(100)
-            self.screen.blit(overlay, (0, 0))
+            self.screen.blit(R.get_overlay((SCREEN_WIDTH, SCREEN_HEIGHT), WHITE, 100), (0, 0))
 
             self.draw_text("YOU WIN!", 800, 450, "warning", BLACK, True)
 
@@ -347,6 +384,28 @@ class GamePlayMixin:
             if e.type == pygame.MOUSEBUTTONDOWN or e.type == pygame.KEYDOWN:
                 self.win_anim_start = None
                 self.state = "LEVEL_SELECT"
+                R.scaled.discard("img_win_final")
+
+    def compose_lose_world(self, bg_lose):
+        # Map plus every plant, bullet and enemy as they stood at the loss,
+        # flattened once; the camera pan then moves a single surface.
+        bg_map = R.get_image("bg_game2") if self.selected_level and self.selected_level.get("theme") == 2 else R.get_image("bg_game1")
+        world = R.track_surface(pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), 0, self.screen))
+        world.fill(BLACK)
+        if bg_map:
+            world.blit(bg_map, (0, 0))
+        elif bg_lose:
+            world.blit(bg_lose, (0, 0))
+
+        for group in (self.battle.plants, self.battle.bullets):
+            for spr in group:
+                world.blit(spr.image, spr.rect)
+        for en in self.battle.enemies:
+            # Target enemy drawn separately after camera move.
+            if self.lose_enemy_id is not None and en.id == self.lose_enemy_id:
+                continue
+            world.blit(en.image, en.rect)
+        return world
 
     def update_lose(self, events):
         now = pygame.time.get_ticks()
@@ -355,54 +414,33 @@ class GamePlayMixin:
             elapsed = now - self.lose_transition_start
 
         bg_lose = R.get_image("img_lose_bg") or R.get_image("bg_game1")
-        bg_map = R.get_image("bg_game2") if self.selected_level and self.selected_level.get("theme") == 2 else R.get_image("bg_game1")
         cam_range = SCREEN_WIDTH  # push everything fully off-screen to the right
         cam_dur = 1500
         self.lose_cam_offset = min(cam_range, int(cam_range * (elapsed / cam_dur))) if cam_dur > 0 else cam_range
 
-        # Clear then draw lose background sliding in from left while map/objects slide right.
-        self.screen.fill(BLACK)
-
         progress = 0 if cam_dur <= 0 else min(1.0, elapsed / cam_dur)
         map_offset = int(cam_range * progress)  # map and objects move right
         lose_offset = -SCREEN_WIDTH + map_offset  # lose bg enters from left to 0
 
-        if bg_lose:
-            x1 = lose_offset
-            x2 = x1 + SCREEN_WIDTH
-            self.screen.blit(bg_lose, (x1, 0))
-            self.screen.blit(bg_lose, (x2, 0))
-
-        if bg_map:
-            self.screen.blit(bg_map, (map_offset, 0))
-
-        draw_offset = map_offset
-
-        # Draw world objects frozen in place, shifted with the camera pan.
-        for p in self.plants:
-            if not hasattr(p, "image"):
-                continue
-            rect = p.rect.copy()
-            rect.x += draw_offset
-            self.screen.blit(p.image, rect)
-
-        for b in self.bullets:
-            if not hasattr(b, "image"):
-                continue
-            rect = b.rect.copy()
-            rect.x += draw_offset
-            self.screen.blit(b.image, rect)
-
-        for en in self.enemies:
-            if not hasattr(en, "image"):
-                continue
-            is_target = self.lose_enemy_id is not None and en.id == self.lose_enemy_id
-            if is_target:
-                # Target enemy drawn separately after camera move.
-                continue
-            rect = en.rect.copy()
-            rect.x += draw_offset
-            self.screen.blit(en.image, rect)
+        if self.lose_final_frame is not None:
+            # Pan, enemy walk and sounds are done; the picture no longer changes.
+            self.screen.blit(self.lose_final_frame, (0, 0))
+            for e in events:
+                if e.type == pygame.KEYDOWN and e.key == pygame.K_ESCAPE:
+                    self.state = "LEVEL_SELECT"
+            return
+
+        if self.lose_world is None:
+            self.lose_world = self.compose_lose_world(bg_lose)
+
+        # The lose background slides in from the left while the frozen world
+        # composite slides out to the right.
+        if bg_lose is None:
+            self.screen.fill(BLACK)
+        elif lose_offset > -SCREEN_WIDTH:
+            self.screen.blit(bg_lose, (lose_offset, 0))
+        if map_offset < SCREEN_WIDTH:
+            self.screen.blit(self.lose_world, (map_offset, 0))
 
         target_move_done = False
         if self.lose_enemy_pos and self.lose_enemy_img_key and self.lose_enemy_start:
@@ -438,10 +476,7 @@ class GamePlayMixin:
             or (self.lose_sound_index >= len(self.lose_sound_sequence) and not self.sfx_channel.get_busy())
         )
         if show_ui:
-            darkness = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-            darkness.fill(BLACK)
-            darkness.set_alpha(150)
-            self.screen.blit(darkness, (0, 0))
+            self.screen.blit(R.get_overlay((SCREEN_WIDTH, SCREEN_HEIGHT), BLACK, 150), (0, 0))
 
             l_img = R.get_image("img_lose")
             l_rect = l_img.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 50))
@@ -450,6 +485,8 @@ class GamePlayMixin:
             r_img = R.get_image("img_return")
             r_rect = r_img.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 150))
             self.screen.blit(r_img, r_rect)
+            self.lose_final_frame = R.track_surface(self.screen.copy())
+            self.lose_world = None
 
         for e in events:
             if e.type == pygame.KEYDOWN and e.key == pygame.K_ESCAPE:
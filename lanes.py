@@ -0,0 +1,74 @@
+from bisect import bisect_right
+from constants import CELL_WIDTH, GRID_COLS, GRID_ROWS, GRID_START_X, SCREEN_WIDTH
+
+# Plants sit 55px left of their grid line (see Plant.__init__).
+PLANT_OFFSET_X = 55
+
+
+# Per-row lookup tables for the battle: plants bucketed by grid cell and
+# enemies sorted by x inside their row. Plants are added/removed explicitly;
+# the enemy lists are rebuilt once per tick with rebuild_enemies().
+class LaneIndex:
+    def __init__(self):
+        self.cells = {}
+        self.version = 0
+        self.lane_enemies = [[] for _ in range(GRID_ROWS)]
+        self.lane_xs = [[] for _ in range(GRID_ROWS)]
+
+    def clear(self):
+        self.cells.clear()
+        self.version += 1
+        for r in range(GRID_ROWS):
+            self.lane_enemies[r] = []
+            self.lane_xs[r] = []
+
+    def add_plant(self, plant):
+        self.cells[(plant.row, plant.col)] = plant
+        self.version += 1
+
+    def remove_plant(self, plant):
+        if self.cells.get((plant.row, plant.col)) is plant:
+            del self.cells[(plant.row, plant.col)]
+            self.version += 1
+
+    def plant_at(self, row, col):
+        p = self.cells.get((row, col))
+        if p is not None and not p.alive():
+            del self.cells[(row, col)]
+            self.version += 1
+            return None
+        return p
+
+    def rebuild_enemies(self, enemies):
+        lanes = [[] for _ in range(GRID_ROWS)]
+        for e in enemies:
+            if 0 <= e.row < GRID_ROWS:
+                lanes[e.row].append(e)
+        for r, lane in enumerate(lanes):
+            lane.sort(key=lambda e: e.rect.x)
+            self.lane_enemies[r] = lane
+            self.lane_xs[r] = [e.rect.x for e in lane]
+
+    def frontmost_enemy(self, row, x):
+        # Closest enemy in this row strictly right of x and still on screen.
+        if not 0 <= row < GRID_ROWS:
+            return None
+        xs = self.lane_xs[row]
+        i = bisect_right(xs, x)
+        while i < len(xs) and xs[i] < SCREEN_WIDTH:
+            e = self.lane_enemies[row][i]
+            if e.alive():
+                return e
+            i += 1
+        return None
+
+    def plants_touching(self, row, rect):
+        # Plants in this row whose rect overlaps rect, frontmost (right) first.
+        first = (rect.left - GRID_START_X + PLANT_OFFSET_X) // CELL_WIDTH
+        last = (rect.right - 1 - GRID_START_X + PLANT_OFFSET_X) // CELL_WIDTH
+        found = []
+        for col in range(min(last, GRID_COLS - 1), max(first, 0) - 1, -1):
+            p = self.plant_at(row, col)
+            if p is not None and p.rect.colliderect(rect):
+                found.append(p)
+        return found
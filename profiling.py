@@ -0,0 +1,174 @@
+import csv
+import json
+import os
+import time
+from collections import deque
+from time import perf_counter
+import pygame
+from constants import SCREEN_HEIGHT
+from resources import R
+
+# Frame phases in display order. Battle.step() laps the middle five.
+PHASES = ("events", "spawn", "plants", "bullets", "enemies", "collision", "draw", "wait", "flip")
+COUNTS = ("plants", "enemies", "bullets", "surface_allocs", "font_renders")
+GRAPH_BUDGET_MS = 1000 / 60
+PANEL_SIZE = (440, 230)
+PANEL_REFRESH_MS = 250
+
+
+# Accumulates wall time per named phase. start() opens a frame, each lap(name)
+# charges the time since the previous mark to that phase. Battle.step() calls
+# resume() and laps "spawn", "plants", "bullets", "enemies" and "collision"
+# when a timer is attached to battle.timer; callers lap their own phases.
+class PhaseTimer:
+    def __init__(self):
+        self.totals = {}
+        self.frames = 0
+        self.spans = []
+        self._mark = perf_counter()
+
+    def reset(self):
+        self.totals = {}
+        self.frames = 0
+
+    def start(self):
+        self.frames += 1
+        self.spans = []
+        self._mark = perf_counter()
+
+    def resume(self):
+        self._mark = perf_counter()
+
+    def lap(self, name):
+        now = perf_counter()
+        dt = now - self._mark
+        self.totals[name] = self.totals.get(name, 0.0) + dt
+        self.spans.append((name, self._mark, dt))
+        self._mark = now
+
+    def ms_per_frame(self):
+        frames = max(1, self.frames)
+        return {name: total * 1000 / frames for name, total in self.totals.items()}
+
+
+# Debug overlay for the main loop: rolling frame-time graph, per-phase
+# timings, entity counts and surface/font allocations. Frames are only
+# recorded while enabled; dump() writes the recording as CSV plus a Chrome
+# trace (chrome://tracing or ui.perfetto.dev).
+class FrameProfiler:
+    def __init__(self, history=240, keep=60 * 60 * 10):
+        self.enabled = False
+        self.timer = PhaseTimer()
+        self.history = deque(maxlen=history)
+        self.records = deque(maxlen=keep)
+        self.origin = perf_counter()
+        self.frame_start = 0
+        self.base_allocs = 0
+        self.base_renders = 0
+        self.counts = {}
+        self.panel = None
+        self.panel_built = 0
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self.history.clear()
+        self.panel = None
+        return self.enabled
+
+    def begin_frame(self):
+        self.timer.start()
+        self.frame_start = self.timer._mark
+        self.base_allocs = R.surface_allocations()
+        self.base_renders = R.text_cache.misses
+
+    def sample(self, entity_counts=None):
+        # Called once the frame is drawn, after the overlay, so the overlay's
+        # own surfaces are counted too.
+        self.counts = dict(entity_counts or {})
+        self.counts["surface_allocs"] = R.surface_allocations() - self.base_allocs
+        self.counts["font_renders"] = R.text_cache.misses - self.base_renders
+
+    def end_frame(self, frame):
+        end = perf_counter()
+        total_ms = (end - self.frame_start) * 1000
+        phases = {}
+        for name, _, dt in self.timer.spans:
+            phases[name] = phases.get(name, 0.0) + dt * 1000
+        self.history.append(total_ms)
+        self.records.append((frame, self.frame_start, total_ms, phases, self.timer.spans, self.counts))
+
+    def draw(self, screen, now):
+        if self.panel is None or now - self.panel_built >= PANEL_REFRESH_MS:
+            self.panel = self._build_panel()
+            self.panel_built = now
+        return screen.blit(self.panel, (10, SCREEN_HEIGHT - PANEL_SIZE[1] - 10))
+
+    def _build_panel(self):
+        w, h = PANEL_SIZE
+        panel = R.track_surface(pygame.Surface(PANEL_SIZE))
+        panel.fill((20, 20, 20))
+        font = R.fonts.get("mono") or R.fonts.get("default")
+
+        graph_h = 80
+        scale = graph_h / (GRAPH_BUDGET_MS * 3)
+        for i, ms in enumerate(self.history):
+            bar = min(graph_h, int(ms * scale))
+            color = (90, 200, 90) if ms <= GRAPH_BUDGET_MS * 1.1 else (220, 80, 60)
+            pygame.draw.line(panel, color, (10 + i, graph_h + 5), (10 + i, graph_h + 5 - bar))
+        budget_y = graph_h + 5 - int(GRAPH_BUDGET_MS * scale)
+        pygame.draw.line(panel, (200, 200, 60), (10, budget_y), (10 + self.history.maxlen, budget_y))
+
+        lines = []
+        if self.history:
+            avg = sum(self.history) / len(self.history)
+            lines.append(f"frame avg {avg:5.2f} ms  max {max(self.history):5.2f} ms  F3 hide  F4 dump")
+        if self.records:
+            phases = self.records[-1][3]
+            row = [f"{name} {phases[name]:.2f}" for name in PHASES if name in phases]
+            lines.append("  ".join(row[:5]))
+            lines.append("  ".join(row[5:]))
+        counts = self.counts
+        lines.append(
+            f"plants {counts.get('plants', 0)}  enemies {counts.get('enemies', 0)}  "
+            f"bullets {counts.get('bullets', 0)}"
+        )
+        lines.append(f"surface allocs/frame {counts.get('surface_allocs', 0)}  font renders/frame {counts.get('font_renders', 0)}")
+
+        y = graph_h + 15
+        for line in lines:
+            panel.blit(R.track_surface(font.render(line, True, (230, 230, 230))), (10, y))
+            y += 24
+        return panel
+
+    def dump(self, base_path=None):
+        if not self.records:
+            print("Profiler: nothing recorded")
+            return None
+        base_path = base_path or f"profile_{time.strftime('%Y%m%d_%H%M%S')}"
+        csv_path = base_path + ".csv"
+        trace_path = base_path + ".trace.json"
+        try:
+            with open(csv_path, "w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow(("frame", "start_ms", "total_ms") + tuple(f"{p}_ms" for p in PHASES) + COUNTS)
+                for frame, start, total_ms, phases, _, counts in self.records:
+                    writer.writerow(
+                        [frame, round((start - self.origin) * 1000, 3), round(total_ms, 3)]
+                        + [round(phases.get(p, 0.0), 3) for p in PHASES]
+                        + [counts.get(c, 0) for c in COUNTS]
+                    )
+
+            events = []
+            for frame, start, total_ms, _, spans, counts in self.records:
+                ts = (start - self.origin) * 1e6
+                events.append({"name": "frame", "ph": "X", "pid": 1, "tid": 1, "ts": ts, "dur": total_ms * 1000, "args": {"frame": frame}})
+                for name, t0, dt in spans:
+                    events.append({"name": name, "ph": "X", "pid": 1, "tid": 2, "ts": (t0 - self.origin) * 1e6, "dur": dt * 1e6})
+                events.append({"name": "counts", "ph": "C", "pid": 1, "ts": ts, "args": counts})
+            with open(trace_path, "w", encoding="utf-8") as f:
+                json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        except Exception as e:
+            print(f"Error writing profile: {e}")
+            return None
+        print(f"Profile written to {os.path.abspath(csv_path)} and {trace_path}")
+        return csv_path, trace_path
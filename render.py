@@ -0,0 +1,189 @@
+import pygame
+from constants import BLACK
+from resources import R
+
+# Past this share of the screen a single flip is cheaper than many updates.
+FULL_FLIP_RATIO = 0.5
+
+
+# Draw callbacks for DirtyRenderer.cell()/top(): each takes the target
+# surface and returns the rect it painted.
+def blit_at(surf, pos, area=None):
+    return lambda surface: surface.blit(surf, pos, area)
+
+
+def text_at(text, x, y, font_key="default", color=BLACK):
+    if text is None:
+        return lambda surface: None
+    return blit_at(R.render_text(text, font_key, color), (x, y))
+
+
+def merge_rects(rects):
+    # Fold overlapping rects into disjoint cluster bounds, so nothing is
+    # restored, redrawn or counted twice.
+    merged = []
+    for r in rects:
+        r = r.copy()
+        i = r.collidelist(merged)
+        while i != -1:
+            r.union_ip(merged.pop(i))
+            i = r.collidelist(merged)
+        merged.append(r)
+    return merged
+
+
+# Dirty-rectangle renderer for the battle screen, in three layers:
+# - the scene: background + stationary sprites (plants) + HUD cells, kept in
+#   an offscreen surface. It is rebuilt only when the background or the
+#   static key changes; a cell is redrawn into it only when its value changes.
+# - moving sprites, blitted each frame and restored from the scene the next.
+# - top items (overlays, tooltip, held card) drawn above the sprites; they
+#   are marked only when their key or rect changes, otherwise repainted just
+#   where something under them was.
+# Drawing is queued and done in end(): every dirty area is restored from the
+# scene first, then sprites and top items are painted over it once. Any frame
+# where the owner did not draw (another state used the screen) forces a full
+# redraw.
+class DirtyRenderer:
+    def __init__(self, screen):
+        self.screen = screen
+        self.screen_rect = screen.get_rect()
+        self.scene = None
+        self.background = None
+        self.static_key = None
+        self.static = []
+        self.last_frame = None
+        self.full = True
+        self.cells = {}
+        self.prev_rects = []
+        self.rects = []
+        self.changed = []
+        self.queue = []
+        self.tops = []
+        self.prev_tops = {}
+
+    def invalidate(self):
+        self.last_frame = None
+
+    def begin(self, background, frame, static_key=None, static_sprites=()):
+        if background is not self.background or static_key != self.static_key:
+            self.background = background
+            self.static_key = static_key
+            self.static = list(static_sprites)
+            if self.scene is None:
+                self.scene = R.track_surface(pygame.Surface(self.screen_rect.size).convert())
+            self.scene.fill(BLACK)
+            if background:
+                self.scene.blit(background, (0, 0))
+            for spr in self.static:
+                self.scene.blit(spr.image, (spr.x, spr.y))
+            self.cells = {}
+            self.last_frame = None
+        self.full = self.last_frame != frame - 1
+        self.last_frame = frame
+        self.rects = []
+        self.changed = []
+        self.queue = []
+        self.tops = []
+
+    def _clip(self, rect):
+        r = pygame.Rect(rect).clip(self.screen_rect)
+        return r if r.width and r.height else None
+
+    def _restore_scene(self, rect):
+        self.scene.set_clip(rect)
+        self.scene.fill(BLACK)
+        if self.background:
+            self.scene.blit(self.background, (0, 0))
+        for spr in self.static:
+            if rect.colliderect(spr.rect):
+                self.scene.blit(spr.image, (spr.x, spr.y))
+        self.scene.set_clip(None)
+
+    def cell(self, name, value, draw):
+        # A HUD element living in the scene. draw(surface) paints it and
+        # returns the rect it covered (or None when there is nothing to show);
+        # it only runs when value differs from last time. Cells must not
+        # overlap each other.
+        old = self.cells.get(name)
+        if old is not None and old[0] == value:
+            return
+        if old is not None and old[1] is not None:
+            self._restore_scene(old[1])
+            self.changed.append(old[1])
+        rect = draw(self.scene)
+        if rect is not None:
+            rect = self._clip(rect)
+            if rect is not None:
+                self.changed.append(rect)
+        self.cells[name] = (value, rect)
+
+    def blit(self, surf, pos, area=None):
+        size = surf.get_size() if area is None else pygame.Rect(area).size
+        r = self._clip((pos, size))
+        if r is not None:
+            self.queue.append((surf, pos, area))
+            self.rects.append(r)
+
+    def draw_group(self, group, alpha=1.0):
+        # Queue each sprite between its previous and current sim position;
+        # alpha is the fraction of a sim tick elapsed since the last step.
+        right = self.screen_rect.right
+        for spr in group:
+            x, y = spr.x, spr.y
+            px, py = spr.prev_pos
+            pos = (round(px + (x - px) * alpha), round(py + (y - py) * alpha))
+            # Enemies queue up past the right edge; don't touch them at all.
+            if pos[0] >= right:
+                continue
+            self.blit(spr.image, pos)
+
+    def top(self, name, key, rect, draw):
+        # draw(screen) must stay inside rect.
+        rect = self._clip(rect)
+        if rect is not None:
+            self.tops.append((name, key, rect, draw))
+
+    def overlay(self, rect):
+        # For something blitted on top after end(): restore it next frame.
+        r = self._clip(rect)
+        if r is not None:
+            self.prev_rects.append(r)
+        return rect
+
+    def end(self):
+        # None means "flip the whole screen".
+        screen = self.screen
+        tops = {name: (key, rect) for name, key, rect, _ in self.tops}
+        if self.full:
+            screen.blit(self.scene, (0, 0))
+            dirty = None
+        else:
+            rects = self.prev_rects + self.rects + self.changed
+            for name, (key, rect) in self.prev_tops.items():
+                if tops.get(name) != (key, rect):
+                    rects.append(rect)
+            for name, (key, rect) in tops.items():
+                if self.prev_tops.get(name) != (key, rect):
+                    rects.append(rect)
+            dirty = merge_rects(rects)
+            for r in dirty:
+                screen.blit(self.scene, r, r)
+        for surf, pos, area in self.queue:
+            screen.blit(surf, pos, area)
+        for name, key, rect, draw in self.tops:
+            if dirty is None or self.prev_tops.get(name) != (key, rect):
+                draw(screen)
+                continue
+            for r in dirty:
+                if r.colliderect(rect):
+                    screen.set_clip(r)
+                    draw(screen)
+            screen.set_clip(None)
+        self.prev_rects = self.rects
+        self.prev_tops = tops
+        if dirty is not None:
+            area = sum(r.width * r.height for r in dirty)
+            if area > FULL_FLIP_RATIO * self.screen_rect.width * self.screen_rect.height:
+                dirty = None
+        return dirty
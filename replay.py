@@ -0,0 +1,130 @@
+import argparse
+import json
+import os
+import struct
+import sys
+import time
+from constants import SIM_DT
+from profiling import PhaseTimer
+from resources import R
+from save_manager import SaveManager
+from vector_battle import create_battle
+
+# File layout: header struct, JSON battle settings, then one fixed-size record
+# per input. Inputs logged at tick N are applied after sim step N.
+REPLAY_MAGIC = b"VSRP"
+REPLAY_VERSION = 3
+REPLAY_HEADER = struct.Struct("<4sHI")
+REPLAY_INPUT = struct.Struct("<IBbbb")
+ACTIONS = ("place", "remove", "pause", "resume", "quit")
+ACTION_ARGS = {"place": 3, "remove": 2, "pause": 0, "resume": 0, "quit": 0}
+
+
+def save_replay(path, battle):
+    header = {
+        "level": battle.level,
+        "mode": battle.mode,
+        "selected_plants": battle.selected_plants,
+        "spawn_delay": battle.spawn_delay,
+        "warning_time": battle.warning_time,
+        "seed": battle.seed,
+        "backend": battle.backend,
+        "ticks": battle.ticks,
+        "outcome": battle.outcome,
+    }
+    meta = json.dumps(header, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    parts = [REPLAY_HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, len(meta)), meta]
+    for tick, action, args in battle.inputs:
+        padded = tuple(args) + (0,) * (3 - len(args))
+        parts.append(REPLAY_INPUT.pack(tick, ACTIONS.index(action), *padded))
+    # Written by the save thread, off the main loop.
+    SaveManager.write(path, b"".join(parts))
+    return path
+
+
+def load_replay(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, meta_len = REPLAY_HEADER.unpack_from(data, 0)
+    if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+        raise ValueError(f"{path} is not a version {REPLAY_VERSION} replay")
+    start = REPLAY_HEADER.size
+    header = json.loads(data[start:start + meta_len].decode("utf-8"))
+    inputs = []
+    for tick, code, a, b, c in REPLAY_INPUT.iter_unpack(data[start + meta_len:]):
+        action = ACTIONS[code]
+        inputs.append((tick, action, (a, b, c)[:ACTION_ARGS[action]]))
+    return header, inputs
+
+
+def apply_input(battle, action, args):
+    if action == "place":
+        battle.place_plant(*args)
+    elif action == "remove":
+        battle.remove_plant(*args)
+    else:
+        # Pause/resume/quit do not touch the sim (its clock stops while
+        # paused); they are kept so a replay shows where the player stopped.
+        battle.record(action, *args)
+
+
+# Re-simulates a replay as fast as possible. Stops at the recorded outcome,
+# or at the recorded tick count for a battle the player quit.
+def play_replay(header, inputs, backend=None, timer=None):
+    battle = create_battle(
+        header["level"],
+        header["mode"],
+        header["selected_plants"],
+        spawn_delay=header["spawn_delay"],
+        warning_time=header["warning_time"],
+        seed=header["seed"],
+        backend=backend or header.get("backend", "sprite"),
+    )
+    battle.timer = timer
+    end_tick = header.get("ticks")
+    i = 0
+    while battle.outcome is None:
+        while i < len(inputs) and inputs[i][0] <= battle.ticks:
+            _, action, args = inputs[i]
+            apply_input(battle, action, args)
+            i += 1
+        if header.get("outcome") is None and end_tick is not None and battle.ticks >= end_tick:
+            break
+        if timer:
+            timer.start()
+        battle.step(SIM_DT)
+    return battle
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-simulate a recorded battle headlessly.")
+    parser.add_argument("path")
+    parser.add_argument("--backend", choices=("sprite", "numpy"), help="override the recorded backend")
+    parser.add_argument("--profile", action="store_true", help="print ms per tick for each phase")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    R.load_sprite_assets()
+    header, inputs = load_replay(args.path)
+    timer = PhaseTimer() if args.profile else None
+    started = time.perf_counter()
+    battle = play_replay(header, inputs, args.backend, timer)
+    if battle.backend != (args.backend or header.get("backend", "sprite")):
+        print(f"Note: ran on the {battle.backend} backend (numpy not available)")
+    wall = time.perf_counter() - started
+
+    level_id = header["level"].get("id") if header.get("level") else None
+    print(f"{level_id} {header['mode']} seed={header['seed']} inputs={len(inputs)}")
+    print(f"outcome={battle.outcome} ticks={battle.ticks} killed={battle.enemies_killed} money={battle.money}")
+    speed = battle.time / 1000 / wall if wall > 0 else 0
+    print(f"simulated {battle.time / 1000:.1f}s in {wall:.2f}s ({speed:.0f}x)")
+    if battle.outcome != header.get("outcome") or battle.ticks != header.get("ticks"):
+        print(f"MISMATCH: recorded outcome={header.get('outcome')} ticks={header.get('ticks')}")
+    if timer:
+        for name, ms in timer.ms_per_frame().items():
+            print(f"  {name:10} {ms:.4f} ms/tick")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1,6 +1,24 @@
+import json
+import mmap
 import os
+import struct
 import sys
+import threading
+from collections import OrderedDict
 import pygame
+from constants import BLACK, SCREEN_HEIGHT, SCREEN_WIDTH, WHITE
+
+# Background loader order: main menu first, then gameplay, then screens that
+# are only reached later (archive, credits, win/lose art).
+LOAD_PRIORITY = ("menu", "gameplay", "late")
+
+# Pre-decoded image archive written by build_asset_pack.py.
+PACK_PATH = "resource/assets.pack"
+PACK_MAGIC = b"VSPK"
+PACK_VERSION = 2
+PACK_HEADER = struct.Struct("<4sIII")
+PACK_ALIGN = 16
+PACK_FORMAT = "BGRA"
 
 
 def resource_path(rel_path: str) -> str:
@@ -8,26 +26,323 @@ def resource_path(rel_path: str) -> str:
     return os.path.join(base, rel_path)
 
 
+# LRU cache of rendered text surfaces keyed by (text, font_key, color).
+class TextCache:
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, font, text, font_key, color):
+        key = (text, font_key, tuple(color))
+        surf = self.surfaces.get(key)
+        if surf is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surf
+        self.misses += 1
+        surf = font.render(text, True, color)
+        self.surfaces[key] = surf
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+        return surf
+
+    def clear(self):
+        self.surfaces.clear()
+
+
+# Smoothscaled copies of loaded images keyed by (image key, size), evicted
+# least-recently-used once their pixel data passes budget_bytes.
+class ScaledCache:
+    def __init__(self, budget_bytes=96 * 1024 * 1024):
+        self.budget_bytes = budget_bytes
+        self.used_bytes = 0
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name, image, size):
+        key = (name, tuple(size))
+        surf = self.surfaces.get(key)
+        if surf is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surf
+        self.misses += 1
+        surf = pygame.transform.smoothscale(image, size)
+        self.surfaces[key] = surf
+        self.used_bytes += self._size_of(surf)
+        while self.used_bytes > self.budget_bytes and len(self.surfaces) > 1:
+            _, old = self.surfaces.popitem(last=False)
+            self.used_bytes -= self._size_of(old)
+        return surf
+
+    def _size_of(self, surf):
+        return surf.get_width() * surf.get_height() * surf.get_bytesize()
+
+    def discard(self, name):
+        for key in [k for k in self.surfaces if k[0] == name]:
+            self.used_bytes -= self._size_of(self.surfaces.pop(key))
+
+    def clear(self):
+        self.surfaces.clear()
+        self.used_bytes = 0
+
+
+# View of assets.pack: a header, a JSON index keyed by resource path, then
+# raw BGRA pixel blocks. BGRA matches what convert_alpha() gives on a 32-bit
+# display, so surfaces made with frombuffer() over the mmap are blit-ready
+# without decoding or copying. The mapping is copy-on-write: drawing onto a
+# packed image touches private pages, never the file (or a read-only page).
+class AssetPack:
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_COPY)
+        magic, version, index_len, self.data_start = PACK_HEADER.unpack_from(self.data, 0)
+        if magic != PACK_MAGIC or version != PACK_VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {PACK_VERSION} asset pack")
+        start = PACK_HEADER.size
+        self.index = json.loads(bytes(self.data[start:start + index_len]).decode("utf-8"))
+        self.view = memoryview(self.data)
+        self.stale = self._find_stale()
+
+    def _find_stale(self):
+        # Source files edited after the pack was built win over the pack.
+        # Checked once here; frozen builds ship the pack and sources together
+        # (with extraction-time mtimes), so they trust the pack.
+        stale = set()
+        if getattr(sys, "frozen", False):
+            return stale
+        for rel_path, entry in self.index.items():
+            try:
+                st = os.stat(resource_path(rel_path))
+            except OSError:
+                continue
+            if st.st_size != entry["source_bytes"] or st.st_mtime_ns != entry["source_mtime_ns"]:
+                stale.add(rel_path)
+        return stale
+
+    def has(self, rel_path):
+        return rel_path in self.index and rel_path not in self.stale
+
+    @classmethod
+    def open(cls, path):
+        if not os.path.exists(path):
+            return None
+        try:
+            return cls(path)
+        except Exception as e:
+            print(f"Asset pack ignored: {e}")
+            return None
+
+    def surface(self, rel_path):
+        if not self.has(rel_path):
+            return None
+        entry = self.index[rel_path]
+        w, h = entry["size"]
+        offset = self.data_start + entry["offset"]
+        return pygame.image.frombuffer(self.view[offset:offset + w * h * 4], (w, h), PACK_FORMAT)
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+
+def write_asset_pack(path, images):
+    # images: iterable of (rel_path, surface). Offsets in the index are
+    # relative to the data section, which starts PACK_ALIGN-aligned.
+    index = {}
+    blobs = []
+    offset = 0
+    for rel_path, surf in images:
+        raw = pygame.image.tobytes(surf, PACK_FORMAT)
+        pad = -offset % PACK_ALIGN
+        offset += pad
+        blobs.append((pad, raw))
+        st = os.stat(resource_path(rel_path))
+        index[rel_path] = {
+            "offset": offset,
+            "size": list(surf.get_size()),
+            "source_bytes": st.st_size,
+            "source_mtime_ns": st.st_mtime_ns,
+        }
+        offset += len(raw)
+
+    index_bytes = json.dumps(index, ensure_ascii=False).encode("utf-8")
+    data_start = PACK_HEADER.size + len(index_bytes)
+    data_start += -data_start % PACK_ALIGN
+    with open(path, "wb") as f:
+        f.write(PACK_HEADER.pack(PACK_MAGIC, PACK_VERSION, len(index_bytes), data_start))
+        f.write(index_bytes)
+        f.write(b"\0" * (data_start - f.tell()))
+        for pad, raw in blobs:
+            f.write(b"\0" * pad)
+            f.write(raw)
+    return len(index)
+
+
 class ResourceManager:
     def __init__(self):
         self.images = {}
         self.fonts = {}
         self.sounds = {}
+        self.image_manifest = {}
+        self.sound_manifest = {}
+        self.decoded = {}
+        self.loader_lock = threading.Lock()
+        self.loader_thread = None
+        self.pack = None
+        self.text_cache = TextCache()
+        self.overlays = {}
+        self.scaled = ScaledCache()
+        # Surfaces created outside the caches (conversions, overlays,
+        # fallbacks, and anything passed through track_surface()).
+        self.allocations = 0
+
+    def register_image(self, name, path, group="gameplay"):
+        self.image_manifest[name] = (path, group)
+
+    def register_sound(self, name, path, group="gameplay"):
+        self.sound_manifest[name] = (path, group)
+
+    def _convert(self, img):
+        if pygame.display.get_surface() is not None:
+            img = img.convert_alpha()
+            self.allocations += 1
+        return img
+
+    def track_surface(self, surf):
+        # Wrap direct pygame.Surface()/copy()/render() calls so the profiler's
+        # allocation count covers them too.
+        self.allocations += 1
+        return surf
+
+    def surface_allocations(self):
+        return self.allocations + self.text_cache.misses + self.scaled.misses
+
+    def open_pack(self):
+        if self.pack is None:
+            self.pack = AssetPack.open(resource_path(PACK_PATH))
+        return self.pack
+
+    def in_pack(self, path):
+        return self.pack is not None and self.pack.has(path)
 
     def load_image(self, name, path):
+        if name not in self.images and self.pack is not None:
+            surf = self.pack.surface(path)
+            if surf is not None:
+                self.images[name] = surf
         if name not in self.images:
             try:
-                img = pygame.image.load(resource_path(path)).convert_alpha()
-                self.images[name] = img
+                self.images[name] = self._convert(pygame.image.load(resource_path(path)))
             except Exception as e:
                 print(f"Error loading {path}: {e}")
-                surf = pygame.Surface((50, 50), pygame.SRCALPHA)
+                surf = self.track_surface(pygame.Surface((50, 50), pygame.SRCALPHA))
                 surf.fill((0, 0, 0, 0))
                 self.images[name] = surf
         return self.images[name]
 
     def get_image(self, name):
-        return self.images.get(name)
+        img = self.images.get(name)
+        if img is not None:
+            return img
+        with self.loader_lock:
+            decoded = self.decoded.pop(name, None)
+        if decoded is not None:
+            img = self.images[name] = self._convert(decoded)
+            return img
+        entry = self.image_manifest.get(name)
+        if entry is None:
+            return None
+        # Not decoded by the loader yet: this asset is needed now, so block.
+        return self.load_image(name, entry[0])
+
+    def get_scaled(self, name, size):
+        img = self.get_image(name)
+        if img is None:
+            return None
+        if img.get_size() == tuple(size):
+            return img
+        return self.scaled.get(name, img, size)
+
+    def get_zoom_frame(self, name, scale, base_size=None, step=0.05):
+        # Scales are snapped to multiples of step so a zoom animation reuses
+        # a small fixed set of frames instead of smoothscaling every frame.
+        img = self.get_image(name)
+        if img is None:
+            return None
+        q = max(step, round(scale / step) * step)
+        w, h = base_size or img.get_size()
+        return self.get_scaled(name, (int(w * q), int(h * q)))
+
+    def bake_zoom(self, name, start_scale, end_scale, base_size=None, step=0.05, limit=None):
+        # Scales at most limit missing frames per call; True once all are cached.
+        img = self.get_image(name)
+        if img is None:
+            return True
+        w, h = base_size or img.get_size()
+        n = int(round((end_scale - start_scale) / step))
+        for i in range(n + 1):
+            q = max(step, round((start_scale + i * step) / step) * step)
+            if (name, (int(w * q), int(h * q))) in self.scaled.surfaces:
+                continue
+            if limit is not None:
+                if limit <= 0:
+                    return False
+                limit -= 1
+            self.get_zoom_frame(name, start_scale + i * step, base_size, step)
+        return True
+
+    def get_overlay(self, size, color, alpha):
+        # Solid fill + surface alpha, built once and shared by every caller.
+        key = (tuple(size), tuple(color), alpha)
+        surf = self.overlays.get(key)
+        if surf is None:
+            surf = pygame.Surface(size)
+            if pygame.display.get_surface() is not None:
+                surf = surf.convert()
+            surf.fill(color)
+            surf.set_alpha(alpha)
+            self.overlays[key] = surf
+            self.allocations += 1
+        return surf
+
+    def get_outline(self, size, color, width, radius=0):
+        # Rect outline on a colorkeyed surface. Blitting it respects a clip
+        # rect; pygame.draw.rect under a clip can put the border on the clip
+        # edge instead.
+        key = ("outline", tuple(size), tuple(color), width, radius)
+        surf = self.overlays.get(key)
+        if surf is None:
+            surf = pygame.Surface(size)
+            if pygame.display.get_surface() is not None:
+                surf = surf.convert()
+            hole = (255, 0, 255) if tuple(color)[:3] != (255, 0, 255) else (0, 255, 0)
+            surf.fill(hole)
+            surf.set_colorkey(hole)
+            pygame.draw.rect(surf, color, surf.get_rect(), width, border_radius=radius)
+            self.overlays[key] = surf
+            self.allocations += 1
+        return surf
+
+    def prebuild_overlays(self):
+        screen = (SCREEN_WIDTH, SCREEN_HEIGHT)
+        self.get_overlay(screen, WHITE, 120)
+        self.get_overlay(screen, WHITE, 220)
+        self.get_overlay(screen, WHITE, 230)
+        self.get_overlay(screen, WHITE, 100)
+        self.get_overlay(screen, BLACK, 150)
+        self.get_overlay((SCREEN_WIDTH, 200), WHITE, 205)
+        self.get_overlay((200, 90), BLACK, 150)
+        self.get_overlay((100, 100), BLACK, 150)
+
+    def render_text(self, text, font_key="default", color=(0, 0, 0)):
+        if font_key not in self.fonts:
+            font_key = "default"
+        return self.text_cache.get(self.fonts[font_key], str(text), font_key, color)
 
     def load_sound(self, name, path):
         if name not in self.sounds:
@@ -39,60 +354,94 @@ class ResourceManager:
                 print(f"Error loading sound {path}: {e}")
         return self.sounds.get(name)
 
-    def load_assets(self):
-        self.load_image("bg_main", "resource/UI/MAINPAGE/main_page_background.jpg")
-        self.load_image("bg_game1", "resource/UI/GAMING/gaming.jpg")
-        self.load_image("bg_game2", "resource/UI/GAMING/gaming2.jpg")
-        self.load_image("bg_credits", "resource/UI/CREDITS/CREDITS1.jpg")
-        self.load_image("bg_archive", "resource/UI/ARCHIVE/ARCHIVE 首页.png")
-        self.load_image("archive_help_1", "resource/UI/ARCHIVE/ARCHIVE 帮助01.png")
-        self.load_image("archive_help_2", "resource/UI/ARCHIVE/ARCHIVE 帮助02.png")
+    def get_sound(self, name):
+        snd = self.sounds.get(name)
+        if snd is None and name in self.sound_manifest:
+            snd = self.load_sound(name, self.sound_manifest[name][0])
+        return snd
+
+    def start_background_loader(self):
+        if self.loader_thread is not None:
+            return
+        self.loader_thread = threading.Thread(target=self._load_in_background, name="asset-loader", daemon=True)
+        self.loader_thread.start()
+
+    def _load_in_background(self):
+        # Decode only; convert_alpha() needs the display and runs on the main
+        # thread the first time get_image() asks for the key.
+        for group in LOAD_PRIORITY:
+            for name, (path, g) in list(self.image_manifest.items()):
+                if g != group or name in self.images or name in self.decoded:
+                    continue
+                if self.in_pack(path):
+                    # Packed (and up to date) images are mapped on demand,
+                    # nothing to decode.
+                    continue
+                try:
+                    img = pygame.image.load(resource_path(path))
+                except Exception:
+                    continue
+                with self.loader_lock:
+                    if name not in self.images:
+                        self.decoded[name] = img
+            for name, (path, g) in list(self.sound_manifest.items()):
+                if g != group or name in self.sounds:
+                    continue
+                try:
+                    snd = pygame.mixer.Sound(resource_path(path))
+                except Exception:
+                    continue
+                snd.set_volume(1.0)
+                self.sounds.setdefault(name, snd)
+
+    def register_assets(self):
+        self.register_image("bg_main", "resource/UI/MAINPAGE/main_page_background.jpg", "menu")
+        self.register_image("hl_start", "resource/UI/MAINPAGE/main_page_background_start_highlight.jpg", "menu")
+        self.register_image("hl_save", "resource/UI/MAINPAGE/main_page_background_archive_highlight.jpg", "menu")
+        self.register_image("hl_quit", "resource/UI/MAINPAGE/main_page_background_quit_highlight.jpg", "menu")
+        self.register_image("hl_credits", "resource/UI/MAINPAGE/main_page_background_credits_highlight.jpg", "menu")
+        self.register_image("bg_credits", "resource/UI/CREDITS/CREDITS1.jpg", "menu")
+        self.register_image("select_overlay", "resource/UI/CREDITS/CHOOSEIDE1.png", "menu")
+        self.register_image("level_hover", "resource/UI/CREDITS/BACKGROUND.png", "menu")
+
+        self.register_image("bg_game1", "resource/UI/GAMING/gaming.jpg")
+        self.register_image("bg_game2", "resource/UI/GAMING/gaming2.jpg")
+        self.register_image("bg_pause", "resource/UI/GAMING/suspension.png")
+        self.register_image("cleaner", "resource/aids/cleaner.png")
+        self.register_image("hidden", "resource/aids/hidden.png")
+        self.register_image("no_money", "resource/aids/no_money.png")
+        for name, path in sprite_assets():
+            self.register_image(name, path)
+        self.register_sound("start", "resource/sounds/start.wav")
+        self.register_sound("error", "resource/sounds/error.wav")
+        self.register_sound("set", "resource/sounds/set.wav")
+        self.register_sound("remove", "resource/sounds/remove.wav")
+        self.register_sound("win", "resource/sounds/win.wav")
+
+        self.register_image("bg_archive", "resource/UI/ARCHIVE/ARCHIVE 首页.png", "late")
+        self.register_image("archive_help_1", "resource/UI/ARCHIVE/ARCHIVE 帮助01.png", "late")
+        self.register_image("archive_help_2", "resource/UI/ARCHIVE/ARCHIVE 帮助02.png", "late")
         for i in range(1, 7):
-            self.load_image(f"植物page{i}", f"resource/UI/ARCHIVE/植物page{i}.png")
+            self.register_image(f"植物page{i}", f"resource/UI/ARCHIVE/植物page{i}.png", "late")
         for i in range(1, 5):
-            self.load_image(f"BUGspage{i}", f"resource/UI/ARCHIVE/BUGspage{i}.png")
-        self.load_image("bg_pause", "resource/UI/GAMING/suspension.png")
-        self.load_image("img_lose", "resource/UI/GAMING/lose.png")
-        self.load_image("img_lose_bg", "resource/UI/GAMING/lose0.jpg")
-        self.load_image("img_return", "resource/UI/GAMING/return_instruction.png")
-        self.load_image("img_win_final", "resource/UI/GAMING/win0.png")
-        self.load_image("img_win_normal", "resource/UI/CREDITS/credits.jpg")
+            self.register_image(f"BUGspage{i}", f"resource/UI/ARCHIVE/BUGspage{i}.png", "late")
+        self.register_image("img_lose", "resource/UI/GAMING/lose.png", "late")
+        self.register_image("img_lose_bg", "resource/UI/GAMING/lose0.jpg", "late")
+        self.register_image("img_return", "resource/UI/GAMING/return_instruction.png", "late")
+        self.register_image("img_win_final", "resource/UI/GAMING/win0.png", "late")
+        self.register_image("img_win_normal", "resource/UI/CREDITS/credits.jpg", "late")
         for i in range(2, 6):
-            self.load_image(f"credits{i}", f"resource/UI/CREDITS/CREDITS{i}.jpg")
-
-        self.load_sound("bgm", "resource/sounds/bgm.wav")
-        self.load_sound("start", "resource/sounds/start.wav")
-        self.load_sound("error", "resource/sounds/error.wav")
-        self.load_sound("error1", "resource/sounds/error1.wav")
-        self.load_sound("set", "resource/sounds/set.wav")
-        self.load_sound("remove", "resource/sounds/remove.wav")
-        self.load_sound("win", "resource/sounds/win.wav")
-
-        self.load_image("hl_start", "resource/UI/MAINPAGE/main_page_background_start_highlight.jpg")
-        self.load_image("hl_save", "resource/UI/MAINPAGE/main_page_background_archive_highlight.jpg")
-        self.load_image("hl_quit", "resource/UI/MAINPAGE/main_page_background_quit_highlight.jpg")
-        self.load_image("hl_credits", "resource/UI/MAINPAGE/main_page_background_credits_highlight.jpg")
-        self.load_image("select_overlay", "resource/UI/CREDITS/CHOOSEIDE1.png")
-        self.load_image("level_hover", "resource/UI/CREDITS/BACKGROUND.png")
-
-        self.load_image("cleaner", "resource/aids/cleaner.png")
-        self.load_image("hidden", "resource/aids/hidden.png")
-        self.load_image("no_money", "resource/aids/no_money.png")
-
-        for i in range(1, 17):
-            self.load_image(f"idle_{i}", f"resource/idle_org/idle_{i}.png")
-            self.load_image(f"idle_{i}withcost", f"resource/idle_org/idle_{i}withcost.png")
-
-        for i in range(1, 17):
-            if i == 6:
-                self.load_image(f"bullet_{i}", "resource/bullet_org/bullet_up.png")
-            elif i == 7:
-                self.load_image(f"bullet_{i}", "resource/bullet_org/bullet_7.png")
-            else:
-                self.load_image(f"bullet_{i}", f"resource/bullet_org/bullet_{i}.png")
+            self.register_image(f"credits{i}", f"resource/UI/CREDITS/CREDITS{i}.jpg", "late")
+        self.register_sound("bgm", "resource/sounds/bgm.wav", "late")
+        self.register_sound("error1", "resource/sounds/error1.wav", "late")
 
-        for i in range(1, 11):
-            self.load_image(f"enemy_{i}", f"resource/enemy_org/enemy_{i}.png")
+    def load_assets(self):
+        # Images and sounds are only registered here; a background thread
+        # decodes them in LOAD_PRIORITY order and get_image() loads anything
+        # still missing on demand.
+        self.register_assets()
+        self.open_pack()
+        self.start_background_loader()
 
         print("--- Asset Integrity Check ---")
         suspect_red_block_files = ["resource/bullet_org/bullet_12.png"]
@@ -106,6 +455,33 @@ class ResourceManager:
         self.fonts["default"] = pygame.font.SysFont("SimHei", 24)
         self.fonts["title"] = pygame.font.SysFont("Arial", 48)
         self.fonts["warning"] = pygame.font.SysFont("Arial", 120)
+        self.fonts["mono"] = pygame.font.SysFont("Consolas", 16)
+
+        self.prebuild_overlays()
+
+    def load_sprite_assets(self):
+        # Plant/bullet/enemy sprites only, loaded synchronously: enough for a
+        # headless Battle.
+        self.open_pack()
+        for name, path in sprite_assets():
+            self.load_image(name, path)
+
+
+def sprite_assets():
+    for i in range(1, 17):
+        yield f"idle_{i}", f"resource/idle_org/idle_{i}.png"
+        yield f"idle_{i}withcost", f"resource/idle_org/idle_{i}withcost.png"
+
+    for i in range(1, 17):
+        if i == 6:
+            yield f"bullet_{i}", "resource/bullet_org/bullet_up.png"
+        elif i == 7:
+            yield f"bullet_{i}", "resource/bullet_org/bullet_7.png"
+        else:
+            yield f"bullet_{i}", f"resource/bullet_org/bullet_{i}.png"
+
+    for i in range(1, 11):
+        yield f"enemy_{i}", f"resource/enemy_org/enemy_{i}.png"
 
 
 R = ResourceManager()
@@ -1,9 +1,24 @@
 import json
 import os
+import threading
+import time
 from constants import SAVE_PATH
 
+# A burst of saves inside this window becomes one write.
+COALESCE_SECONDS = 0.25
 
+
+# Saves are written behind the main loop: save()/write() only queue the bytes
+# (the newest payload per path wins) and a daemon thread writes them to a
+# temp file that os.replace() swaps in, so a crash never leaves a half-written
+# file. flush() blocks until everything queued is on disk; call it on exit.
 class SaveManager:
+    _cond = threading.Condition()
+    _pending = {}
+    _writing = False
+    _flushing = False
+    _thread = None
+
     @staticmethod
     def load():
         default_data = {
@@ -27,10 +42,83 @@ class SaveManager:
         except Exception:
             return default_data
 
+    @classmethod
+    def save(cls, data):
+        # Serialized now, so later changes to data don't leak into this save.
+        try:
+            payload = json.dumps(data).encode("utf-8")
+        except Exception as e:
+            print(f"Save failed: {e}")
+            return
+        cls.write(SAVE_PATH, payload)
+
+    @classmethod
+    def write(cls, path, payload):
+        with cls._cond:
+            cls._pending[path] = payload
+            if cls._thread is None or not cls._thread.is_alive():
+                cls._thread = threading.Thread(target=cls._writer, name="save-writer", daemon=True)
+                cls._thread.start()
+            cls._cond.notify_all()
+
+    @classmethod
+    def delete(cls, path):
+        # Queued like a write, so it cannot overtake an earlier write.
+        cls.write(path, None)
+
+    @classmethod
+    def flush(cls, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        with cls._cond:
+            cls._flushing = True
+            cls._cond.notify_all()
+            try:
+                while cls._pending or cls._writing:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        print("Save flush timed out")
+                        return False
+                    cls._cond.wait(remaining)
+            finally:
+                cls._flushing = False
+        return True
+
+    @classmethod
+    def _writer(cls):
+        while True:
+            with cls._cond:
+                while not cls._pending:
+                    cls._cond.wait()
+                deadline = time.monotonic() + COALESCE_SECONDS
+                while not cls._flushing:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    cls._cond.wait(remaining)
+                batch = cls._pending
+                cls._pending = {}
+                cls._writing = True
+            for path, payload in batch.items():
+                cls._write_atomic(path, payload)
+            with cls._cond:
+                cls._writing = False
+                cls._cond.notify_all()
+
     @staticmethod
-    def save(data):
+    def _write_atomic(path, payload):
+        tmp = path + ".tmp"
         try:
-            with open(SAVE_PATH, "w", encoding="utf-8") as f:
-                json.dump(data, f)
+            if payload is None:
+                if os.path.exists(path):
+                    os.remove(path)
+                return
+            folder = os.path.dirname(path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            with open(tmp, "wb") as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
         except Exception as e:
             print(f"Save failed: {e}")
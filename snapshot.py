@@ -0,0 +1,183 @@
+import json
+import struct
+from entities import PLANT_TABLE, Plant, sync_rects
+from resources import R
+from vector_battle import create_battle
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Layout: header struct, JSON scalars (settings, money, clocks, wave cursor,
+# inputs), the entity RNG state, then packed entity blocks - fixed-size
+# structs for sprites, raw column bytes for the numpy backend. The wave
+# schedule is not stored; it is rebuilt from the seed.
+SNAPSHOT_MAGIC = b"VSBS"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_HEADER = struct.Struct("<4sHI")
+COUNT = struct.Struct("<I")
+RNG_STATE = struct.Struct("<625I")
+# p_id, row, col, hp, last_fire
+PLANT_REC = struct.Struct("<BBBdd")
+# e_id, row, x, y, prev x, prev y, hp, reward, stack, attacking, frozen, stack head
+ENEMY_REC = struct.Struct("<BBdddddiIBBB")
+# image, row, type, damage, x, y, prev x, prev y, speed, vy, start_y
+BULLET_REC = struct.Struct("<BBBdddddddd")
+BULLET_IMAGES = tuple(stats.bullet_image for stats in PLANT_TABLE)
+
+
+def _bullet_image_ids():
+    return {id(R.get_image(key)): i for i, key in enumerate(BULLET_IMAGES)}
+
+
+def capture(battle):
+    vector = battle.backend == "numpy"
+    rng_version, rng_words, rng_gauss = battle.rng.getstate()
+    meta = {
+        "backend": battle.backend,
+        "level": battle.level,
+        "mode": battle.mode,
+        "selected_plants": battle.selected_plants,
+        "spawn_delay": battle.spawn_delay,
+        "warning_time": battle.warning_time,
+        "seed": battle.seed,
+        "time": battle.time,
+        "ticks": battle.ticks,
+        "money": battle.money,
+        "enemies_killed": battle.enemies_killed,
+        "outcome": battle.outcome,
+        "plant_cd_status": list(battle.plant_cd_status.items()),
+        "waves": battle.wave_manager.get_state(),
+        "inputs": battle.inputs,
+        "rng": [rng_version, rng_gauss],
+    }
+    meta_bytes = json.dumps(meta, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    parts = [SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(meta_bytes)), meta_bytes, RNG_STATE.pack(*rng_words)]
+
+    plants = list(battle.plants)
+    parts.append(COUNT.pack(len(plants)))
+    parts.extend(PLANT_REC.pack(p.id, p.row, p.col, p.hp, p.last_fire) for p in plants)
+
+    if vector:
+        ids = _bullet_image_ids()
+        images = [ids.get(id(img), 0) for img in battle.bullet_sink.images]
+        parts.append(COUNT.pack(len(images)))
+        parts.append(bytes(images))
+        for cols in (battle.enemy_cols, battle.bullet_cols):
+            cols.flush()
+            parts.append(COUNT.pack(len(cols)))
+            parts.extend(getattr(cols, name).tobytes() for name in cols.fields)
+    else:
+        heads = {id(e) for e in battle.stack_heads.values()}
+        enemies = list(battle.enemies)
+        parts.append(COUNT.pack(len(enemies)))
+        parts.extend(
+            ENEMY_REC.pack(
+                e.id, e.row, e.x, e.y, e.prev_pos[0], e.prev_pos[1], e.hp,
+                e.reward, e.stack, e.is_attacking, e.frozen, id(e) in heads,
+            )
+            for e in enemies
+        )
+        ids = _bullet_image_ids()
+        bullets = list(battle.bullets)
+        parts.append(COUNT.pack(len(bullets)))
+        parts.extend(
+            BULLET_REC.pack(
+                ids.get(id(b.image), 0), b.row, b.b_type, b.damage, b.x, b.y,
+                b.prev_pos[0], b.prev_pos[1], b.speed, b.vy, b.start_y,
+            )
+            for b in bullets
+        )
+    return b"".join(parts)
+
+
+def restore(data):
+    magic, version, meta_len = SNAPSHOT_HEADER.unpack_from(data, 0)
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+        raise ValueError(f"not a version {SNAPSHOT_VERSION} battle snapshot")
+    pos = SNAPSHOT_HEADER.size
+    meta = json.loads(bytes(data[pos:pos + meta_len]).decode("utf-8"))
+    pos += meta_len
+
+    battle = create_battle(
+        meta["level"],
+        meta["mode"],
+        meta["selected_plants"],
+        spawn_delay=meta["spawn_delay"],
+        warning_time=meta["warning_time"],
+        seed=meta["seed"],
+        backend=meta["backend"],
+    )
+    if battle.backend != meta["backend"]:
+        raise ValueError(f"snapshot needs the {meta['backend']} backend")
+    battle.time = meta["time"]
+    battle.ticks = meta["ticks"]
+    battle.money = meta["money"]
+    battle.enemies_killed = meta["enemies_killed"]
+    battle.outcome = meta["outcome"]
+    battle.plant_cd_status = {p_idx: t for p_idx, t in meta["plant_cd_status"]}
+    battle.inputs = [(tick, action, tuple(args)) for tick, action, args in meta["inputs"]]
+    battle.wave_manager.set_state(meta["waves"])
+    rng_version, rng_gauss = meta["rng"]
+    battle.rng.setstate((rng_version, RNG_STATE.unpack_from(data, pos), rng_gauss))
+    pos += RNG_STATE.size
+
+    (count,) = COUNT.unpack_from(data, pos)
+    pos += COUNT.size
+    for p_id, row, col, hp, last_fire in PLANT_REC.iter_unpack(data[pos:pos + count * PLANT_REC.size]):
+        plant = Plant(p_id, (row, col), last_fire)
+        plant.hp = hp
+        battle.plants.add(plant)
+        battle.lanes.add_plant(plant)
+    pos += count * PLANT_REC.size
+
+    if battle.backend == "numpy":
+        (count,) = COUNT.unpack_from(data, pos)
+        pos += COUNT.size
+        sink = battle.bullet_sink
+        for i in data[pos:pos + count]:
+            image = R.get_image(BULLET_IMAGES[i])
+            sink.image_ids[id(image)] = len(sink.images)
+            sink.images.append(image)
+        pos += count
+        for cols in (battle.enemy_cols, battle.bullet_cols):
+            (count,) = COUNT.unpack_from(data, pos)
+            pos += COUNT.size
+            for name, dtype in cols.fields.items():
+                arr = np.frombuffer(data, dtype=dtype, count=count, offset=pos).copy()
+                setattr(cols, name, arr)
+                pos += arr.nbytes
+        return battle
+
+    (count,) = COUNT.unpack_from(data, pos)
+    pos += COUNT.size
+    for rec in ENEMY_REC.iter_unpack(data[pos:pos + count * ENEMY_REC.size]):
+        e_id, row, x, y, px, py, hp, reward, stack, attacking, frozen, head = rec
+        enemy = battle.enemy_pool.acquire(e_id, row)
+        enemy.x = x
+        enemy.y = y
+        enemy.prev_pos = (px, py)
+        enemy.hp = hp
+        enemy.reward = reward
+        enemy.stack = stack
+        enemy.is_attacking = bool(attacking)
+        enemy.frozen = bool(frozen)
+        battle.enemies.add(enemy)
+        if head:
+            battle.stack_heads[(e_id, row)] = enemy
+    pos += count * ENEMY_REC.size
+
+    (count,) = COUNT.unpack_from(data, pos)
+    pos += COUNT.size
+    for rec in BULLET_REC.iter_unpack(data[pos:pos + count * BULLET_REC.size]):
+        img, row, b_type, damage, x, y, px, py, speed, vy, start_y = rec
+        bullet = battle.bullet_pool.acquire(R.get_image(BULLET_IMAGES[img]), x, y, damage, row, b_type)
+        bullet.prev_pos = (px, py)
+        bullet.speed = speed
+        bullet.vy = vy
+        bullet.start_y = start_y
+        battle.bullets.add(bullet)
+    sync_rects(battle.enemies)
+    sync_rects(battle.bullets)
+    return battle
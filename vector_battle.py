@@ -0,0 +1,468 @@
+import math
+from bisect import bisect_right
+import pygame
+from battle import Battle
+from constants import (
+    CELL_HEIGHT,
+    CELL_WIDTH,
+    GRID_COLS,
+    GRID_ROWS,
+    GRID_START_X,
+    GRID_START_Y,
+    SCREEN_WIDTH,
+)
+from entities import ENEMY_TABLE, PT_THR, Bullet, Enemy, EntityPool
+from lanes import PLANT_OFFSET_X
+from resources import R
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+HAS_NUMPY = np is not None
+
+KIND_STR = 0
+KIND_THR = 1
+
+
+# Structure-of-arrays storage: one numpy array per field. Rows added during a
+# tick are buffered and appended in one concatenate by flush().
+class Columns:
+    def __init__(self, fields):
+        self.fields = fields
+        self.pending = []
+        for name, dtype in fields.items():
+            setattr(self, name, np.empty(0, dtype=dtype))
+
+    def __len__(self):
+        return len(self.x)
+
+    def add(self, **row):
+        self.pending.append(row)
+
+    def flush(self):
+        if not self.pending:
+            return
+        count = len(self.pending)
+        for name, dtype in self.fields.items():
+            new = np.fromiter((r[name] for r in self.pending), dtype=dtype, count=count)
+            setattr(self, name, np.concatenate((getattr(self, name), new)))
+        self.pending = []
+
+    def keep(self, mask):
+        for name in self.fields:
+            setattr(self, name, getattr(self, name)[mask])
+
+
+class Target:
+    __slots__ = ("rect",)
+
+    def __init__(self, rect):
+        self.rect = rect
+
+
+# Sprite built from array rows only when something needs to draw or inspect it.
+class EnemyView(pygame.sprite.Sprite):
+    def __init__(self, e_id, row, x, y, w, h, hp, reward, prev_pos=None):
+        super().__init__()
+        self.image = R.get_image(ENEMY_TABLE[e_id].image)
+        self.rect = pygame.Rect(int(x), int(y), w, h)
+        self.x = x
+        self.y = y
+        self.prev_pos = prev_pos or (x, y)
+        self.id = e_id
+        self.row = row
+        self.hp = hp
+        self.reward = reward
+        self.frozen = False
+
+
+class BulletView(pygame.sprite.Sprite):
+    def __init__(self, image, x, y, w, h, damage, row, prev_pos=None):
+        super().__init__()
+        self.image = image
+        self.rect = pygame.Rect(int(x), int(y), w, h)
+        self.x = x
+        self.y = y
+        self.prev_pos = prev_pos or (x, y)
+        self.damage = damage
+        self.row = row
+
+
+# Receives Bullet sprites from Plant.fire() and stores them as array rows.
+class BulletSink:
+    def __init__(self, columns):
+        self.columns = columns
+        self.images = []
+        self.image_ids = {}
+
+    def add(self, bullet):
+        key = id(bullet.image)
+        if key not in self.image_ids:
+            self.image_ids[key] = len(self.images)
+            self.images.append(bullet.image)
+        self.columns.add(
+            x=bullet.rect.x,
+            y=bullet.rect.y,
+            px=bullet.rect.x,
+            py=bullet.rect.y,
+            w=bullet.rect.width,
+            h=bullet.rect.height,
+            vy=bullet.vy,
+            speed=bullet.speed,
+            gravity=bullet.gravity,
+            start_y=bullet.start_y,
+            damage=bullet.damage,
+            row=bullet.row,
+            kind=KIND_THR if bullet.b_type == PT_THR else KIND_STR,
+            img=self.image_ids[key],
+        )
+        if bullet.pool is not None:
+            bullet.pool.release(bullet)
+
+
+# Battle with enemies and bullets kept in numpy arrays. Plants stay sprites
+# (at most GRID_ROWS x GRID_COLS of them); movement, thrower arcs, plant
+# contact and bullet hits are computed for all enemies/bullets at once.
+class VectorBattle(Battle):
+    backend = "numpy"
+
+    def _init_entities(self):
+        if np is None:
+            raise RuntimeError("VectorBattle requires numpy")
+        self.enemy_cols = Columns(
+            {
+                "id": np.int16,
+                "row": np.int16,
+                "x": np.float64,
+                "y": np.float64,
+                "px": np.float64,
+                "py": np.float64,
+                "w": np.int32,
+                "h": np.int32,
+                "hp": np.float64,
+                "speed": np.float64,
+                "reward": np.int32,
+                "stack": np.int32,
+            }
+        )
+        self.bullet_cols = Columns(
+            {
+                "x": np.float64,
+                "y": np.float64,
+                "px": np.float64,
+                "py": np.float64,
+                "w": np.int32,
+                "h": np.int32,
+                "vy": np.float64,
+                "speed": np.float64,
+                "gravity": np.float64,
+                "start_y": np.float64,
+                "damage": np.float64,
+                "row": np.int16,
+                "kind": np.int8,
+                "img": np.int16,
+            }
+        )
+        # Plants still build a Bullet per shot; the sink copies it into the
+        # columns and hands it straight back to this pool.
+        self.enemy_pool = None
+        self.bullet_pool = EntityPool(Bullet)
+        self.bullet_sink = BulletSink(self.bullet_cols)
+        self.enemy_sizes = {}
+        self._lane_order = []
+        self._lane_xs = []
+        self._plant_grid = None
+        self._plant_grid_version = None
+        self._views_tick = None
+        self._enemy_views = None
+        self._bullet_views = None
+
+    def entity_counts(self):
+        # Column lengths; avoids building the sprite views just to count them.
+        return {
+            "plants": len(self.plants),
+            "enemies": len(self.enemy_cols) + len(self.enemy_cols.pending),
+            "bullets": len(self.bullet_cols) + len(self.bullet_cols.pending),
+        }
+
+    def _enemy_size(self, e_id):
+        size = self.enemy_sizes.get(e_id)
+        if size is None:
+            img = R.get_image(ENEMY_TABLE[e_id].image)
+            size = img.get_size() if img else (110, 110)
+            self.enemy_sizes[e_id] = size
+        return size
+
+    def spawn_enemy(self, e_id, row):
+        stats = ENEMY_TABLE[e_id]
+        e = self.enemy_cols
+        cap = self.enemy_cap
+        if cap is not None and len(e) + len(e.pending) >= cap:
+            # Same order as Battle: type and row, then row, then type, then any.
+            e.flush()
+            same = np.nonzero((e.id == e_id) & (e.row == row))[0]
+            if not len(same):
+                same = np.nonzero(e.row == row)[0]
+            if not len(same):
+                same = np.nonzero(e.id == e_id)[0]
+            if not len(same):
+                same = np.arange(len(e))
+            if len(same):
+                j = same[-1]
+                e.hp[j] += stats.hp
+                e.reward[j] += stats.reward
+                e.stack[j] += 1
+                return
+        w, h = self._enemy_size(e_id)
+        y = GRID_START_Y + row * CELL_HEIGHT - 55
+        self.enemy_cols.add(
+            id=e_id,
+            row=row,
+            x=SCREEN_WIDTH,
+            y=y,
+            px=SCREEN_WIDTH,
+            py=y,
+            w=w,
+            h=h,
+            hp=stats.hp,
+            speed=stats.speed,
+            reward=stats.reward,
+            stack=1,
+        )
+
+    def _enemy_view(self, i):
+        e = self.enemy_cols
+        return EnemyView(
+            int(e.id[i]),
+            int(e.row[i]),
+            float(e.x[i]),
+            float(e.y[i]),
+            int(e.w[i]),
+            int(e.h[i]),
+            float(e.hp[i]),
+            int(e.reward[i]),
+            (float(e.px[i]), float(e.py[i])),
+        )
+
+    def _refresh_views(self):
+        if self._views_tick == self.ticks:
+            return
+        self._views_tick = self.ticks
+        self._enemy_views = pygame.sprite.Group(self._enemy_view(i) for i in range(len(self.enemy_cols)))
+        b = self.bullet_cols
+        images = self.bullet_sink.images
+        self._bullet_views = pygame.sprite.Group(
+            BulletView(
+                images[b.img[i]],
+                float(b.x[i]),
+                float(b.y[i]),
+                int(b.w[i]),
+                int(b.h[i]),
+                float(b.damage[i]),
+                int(b.row[i]),
+                (float(b.px[i]), float(b.py[i])),
+            )
+            for i in range(len(b))
+        )
+
+    @property
+    def enemies(self):
+        self._refresh_views()
+        return self._enemy_views
+
+    @property
+    def bullets(self):
+        self._refresh_views()
+        return self._bullet_views
+
+    def _index_lanes(self):
+        e = self.enemy_cols
+        xs = np.floor(e.x)
+        order = np.lexsort((xs, e.row))
+        bounds = np.searchsorted(e.row[order], np.arange(GRID_ROWS + 1)).tolist()
+        order_list = order.tolist()
+        xs_sorted = xs[order].tolist()
+        self._lane_order = [order_list[bounds[r]:bounds[r + 1]] for r in range(GRID_ROWS)]
+        self._lane_xs = [xs_sorted[bounds[r]:bounds[r + 1]] for r in range(GRID_ROWS)]
+        self._targets = {}
+
+    def frontmost_enemy(self, row, x):
+        if not 0 <= row < GRID_ROWS:
+            return None
+        xs = self._lane_xs[row]
+        i = bisect_right(xs, x)
+        if i >= len(xs) or xs[i] >= SCREEN_WIDTH:
+            return None
+        j = self._lane_order[row][i]
+        target = self._targets.get(j)
+        if target is None:
+            e = self.enemy_cols
+            target = Target(pygame.Rect(int(e.x[j]), int(e.y[j]), int(e.w[j]), int(e.h[j])))
+            self._targets[j] = target
+        return target
+
+    def _plant_arrays(self):
+        if self._plant_grid_version != self.lanes.version:
+            self._plant_grid_version = self.lanes.version
+            grid = [[None] * GRID_COLS for _ in range(GRID_ROWS)]
+            bounds = np.empty((4, GRID_ROWS, GRID_COLS))
+            bounds[0] = np.inf
+            bounds[1] = -np.inf
+            bounds[2] = np.inf
+            bounds[3] = -np.inf
+            for (r, c), p in self.lanes.cells.items():
+                grid[r][c] = p
+                bounds[:, r, c] = (p.rect.left, p.rect.right, p.rect.top, p.rect.bottom)
+            self._plant_grid = (grid, bounds)
+        return self._plant_grid
+
+    def _update_bullets(self):
+        b = self.bullet_cols
+        b.px[:] = b.x
+        b.py[:] = b.y
+        b.x += b.speed
+        thr = b.kind == KIND_THR
+        b.y[thr] += b.vy[thr]
+        b.vy[thr] += b.gravity[thr]
+        dead = (thr & (b.y > b.start_y + 100)) | (b.x > SCREEN_WIDTH)
+        if dead.any():
+            b.keep(~dead)
+
+    def _update_enemies(self):
+        e = self.enemy_cols
+        n = len(e)
+        if n == 0:
+            return
+        e.px[:] = e.x
+
+        grid, (p_left, p_right, p_top, p_bottom) = self._plant_arrays()
+
+        left = np.floor(e.x)
+        right = left + e.w
+        top = np.floor(e.y)
+        bottom = top + e.h
+        rows = e.row.astype(np.intp)
+        last = (right - 1 - GRID_START_X + PLANT_OFFSET_X) // CELL_WIDTH
+
+        # Frontmost touching plant first, like LaneIndex.plants_touching().
+        target_col = np.full(n, -1, dtype=np.intp)
+        span = int(math.ceil(int(e.w.max()) / CELL_WIDTH)) + 1
+        for k in range(span):
+            col = (last - k).astype(np.intp)
+            valid = (target_col < 0) & (col >= 0) & (col < GRID_COLS)
+            c = np.minimum(np.maximum(col, 0), GRID_COLS - 1)
+            pl = p_left[rows, c]
+            hit = (
+                valid
+                & (pl < right)
+                & (p_right[rows, c] > left)
+                & (p_top[rows, c] < bottom)
+                & (p_bottom[rows, c] > top)
+                & (right > pl + 20)
+            )
+            target_col[hit] = c[hit]
+
+        attacking = target_col >= 0
+        if attacking.any():
+            damage = np.zeros((GRID_ROWS, GRID_COLS))
+            np.add.at(damage, (rows[attacking], target_col[attacking]), Enemy.damage_per_frame)
+            for r, c in zip(*np.nonzero(damage)):
+                p = grid[r][c]
+                p.hp -= damage[r, c]
+                if p.hp <= 0:
+                    p.kill()
+                    self.lanes.remove_plant(p)
+                    # The enemy that finishes a plant walks on this tick.
+                    attacking[(rows == r) & (target_col == c)] = False
+
+        e.x[~attacking] -= e.speed[~attacking]
+
+    def _resolve_hits(self):
+        e = self.enemy_cols
+        b = self.bullet_cols
+        if len(e) == 0 or len(b) == 0:
+            return
+        el = np.floor(e.x)[:, None]
+        et = np.floor(e.y)[:, None]
+        bl = np.floor(b.x)[None, :]
+        bt = np.floor(b.y)[None, :]
+        hit = (bl < el + e.w[:, None]) & (bl + b.w[None, :] > el) & (bt < et + e.h[:, None]) & (bt + b.h[None, :] > et)
+        if not hit.any():
+            return
+        e.hp -= hit @ b.damage
+        b.keep(~hit.any(axis=0))
+
+    def _remove_dead(self):
+        e = self.enemy_cols
+        dead = e.hp <= 0
+        if dead.any():
+            self.money += int(e.reward[dead].sum())
+            self.enemies_killed += int(e.stack[dead].sum())
+            e.keep(~dead)
+
+    def step(self, dt):
+        if self.outcome is not None:
+            return self.outcome
+
+        self.time += dt
+        self.ticks += 1
+        now = self.time
+        timer = self.timer
+        if timer:
+            timer.resume()
+
+        if now > self.spawn_delay:
+            for (e_id, row) in self.wave_manager.update(now):
+                self.spawn_enemy(e_id, row)
+        self.enemy_cols.flush()
+        if timer:
+            timer.lap("spawn")
+
+        self._index_lanes()
+        self.plants.update(now, self, self.bullet_sink, game_ref=self)
+        self.bullet_cols.flush()
+        if timer:
+            timer.lap("plants")
+        self._update_bullets()
+        if timer:
+            timer.lap("bullets")
+        self._update_enemies()
+        if timer:
+            timer.lap("enemies")
+        self._resolve_hits()
+        self._remove_dead()
+
+        e = self.enemy_cols
+        if self.mode != "ENDLESS":
+            if self.wave_manager.finished_spawning:
+                offscreen = np.floor(e.x) >= SCREEN_WIDTH
+                if offscreen.any():
+                    e.keep(~offscreen)
+                if len(e) == 0:
+                    self.outcome = "WIN"
+                    if timer:
+                        timer.lap("collision")
+                    return self.outcome
+
+        xs = np.floor(e.x)
+        gone = (xs > SCREEN_WIDTH + 200) | (xs < -200)
+        if gone.any():
+            e.keep(~gone)
+            xs = xs[~gone]
+
+        breached = np.nonzero(xs < 200)[0]
+        if len(breached):
+            self.outcome = "LOSE"
+            self.lose_enemy = self._enemy_view(breached[0])
+
+        if timer:
+            timer.lap("collision")
+        return self.outcome
+
+
+def create_battle(*args, backend="sprite", **kwargs):
+    if backend == "numpy" and HAS_NUMPY:
+        return VectorBattle(*args, **kwargs)
+    return Battle(*args, **kwargs)
@@ -1,23 +1,130 @@
 import random
-
-
+from bisect import bisect_right
+from collections import OrderedDict
+
+# Compiled spawn timelines keyed by (kind, level or wave, difficulty, seed).
+# A timeline depends only on those, so restarts and replays reuse it.
+SCHEDULE_CACHE_SIZE = 64
+_schedules = OrderedDict()
+
+
+def _cached_schedule(key, compile_fn):
+    schedule = _schedules.get(key)
+    if schedule is None:
+        schedule = compile_fn()
+        _schedules[key] = schedule
+        if len(_schedules) > SCHEDULE_CACHE_SIZE:
+            _schedules.popitem(last=False)
+    else:
+        _schedules.move_to_end(key)
+    return schedule
+
+
+ROWS = range(5)
+
+
+# Walker/Vose alias table over {value: weight}: O(1) per draw, one uniform
+# number each. Built once per wave when the plan is made.
+class AliasTable:
+    __slots__ = ("values", "prob", "alias")
+
+    def __init__(self, weights):
+        weights = weights or {0: 1, 1: 1}
+        self.values = list(weights.keys())
+        n = len(self.values)
+        total = sum(weights.values())
+        scaled = [w * n / total for w in weights.values()]
+        self.prob = [1.0] * n
+        self.alias = list(self.values)
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s = small.pop()
+            g = large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = self.values[g]
+            scaled[g] += scaled[s] - 1.0
+            (small if scaled[g] < 1.0 else large).append(g)
+
+    def sample(self, rng, k=1):
+        values, prob, alias = self.values, self.prob, self.alias
+        n = len(values)
+        rand = rng.random
+        out = []
+        for _ in range(k):
+            u = rand() * n
+            i = int(u)
+            out.append(values[i] if u - i < prob[i] else alias[i])
+        return out
+
+
+def _compile_wave(wave, rng, start, times, spawns):
+    # Batches of 1..batch enemies every wave["gap"] ms from start; appends to
+    # times/spawns and returns the time of the last batch.
+    t = start
+    spawned = 0
+    total = wave["total"]
+    sampler = wave["sampler"]
+    while True:
+        count = rng.randint(1, min(wave["batch"], total - spawned))
+        times.extend([t] * count)
+        spawns.extend(zip(sampler.sample(rng, count), rng.choices(ROWS, k=count)))
+        spawned += count
+        if spawned >= total:
+            return t
+        t += wave["gap"]
+
+
+# Story waves compiled into one sorted timeline of (time_ms, enemy_id, row),
+# with time counted from the first update() call. update() only advances a
+# cursor past the entries that are due.
 class WaveManager:
-    def __init__(self, level_data, difficulty_factor=1.0):
+    def __init__(self, level_data, difficulty_factor=1.0, seed=None):
         self.level_data = level_data or {}
         self.level_id = str(self.level_data.get("id", "1-1"))
         self.difficulty = max(0.5, difficulty_factor)
+        self.seed = seed if seed is not None else random.randrange(1 << 32)
         self.chapter, self.stage = self._parse_level_id(self.level_id)
-        self.waves = self._make_plan()
+        key = ("story", self.level_id, bool(self.level_data.get("final")), self.difficulty, self.seed)
+        self.waves, self.times, self.spawns, self.wave_starts = _cached_schedule(key, self._compile)
+        self.cursor = 0
+        self.start_time = None
         self.current_wave_idx = 0
-        self.spawned_in_wave = 0
-        self.next_spawn_time = 0
-        self.finished_spawning = False
-        self.wave_gap_end = 0
-        self.waiting_wave_gap = False
-        self.level_start_time = 0
+        self.finished_spawning = not self.times
         self.total_spawned = 0
-        self.total_enemies = sum(w["total"] for w in self.waves)
-        self.killed_count = 0
+        self.total_enemies = len(self.times)
+
+    def _compile(self):
+        waves = self._make_plan()
+        rng = random.Random(f"{self.seed}:waves")
+        times = []
+        spawns = []
+        wave_starts = []
+        t = 0
+        for wave in waves:
+            wave_starts.append(t)
+            t = _compile_wave(wave, rng, t, times, spawns) + wave["wave_gap"]
+        return waves, tuple(times), tuple(spawns), tuple(wave_starts)
+
+    @property
+    def timeline(self):
+        return [(t, e_id, row) for t, (e_id, row) in zip(self.times, self.spawns)]
+
+    def get_state(self):
+        # The schedule itself is rebuilt (or fetched from the cache) from the
+        # level, difficulty and seed; only the position in it is saved.
+        return {
+            "cursor": self.cursor,
+            "start_time": self.start_time,
+            "current_wave_idx": self.current_wave_idx,
+            "finished_spawning": self.finished_spawning,
+        }
+
+    def set_state(self, state):
+        self.cursor = self.total_spawned = state["cursor"]
+        self.start_time = state["start_time"]
+        self.current_wave_idx = state["current_wave_idx"]
+        self.finished_spawning = state["finished_spawning"]
 
     def _parse_level_id(self, level_id):
         try:
@@ -64,6 +171,7 @@ class WaveManager:
                     "wave_gap": wave_gap,
                     "batch": batch,
                     "weights": weights,
+                    "sampler": AliasTable(weights),
                 }
             )
 
@@ -116,66 +224,53 @@ class WaveManager:
         return weights
 
     def update(self, current_time):
-        spawns = []
         if self.finished_spawning:
-            return spawns
-
-        if self.waiting_wave_gap:
-            if current_time >= self.wave_gap_end:
-                self.waiting_wave_gap = False
-                self.current_wave_idx += 1
-                self.spawned_in_wave = 0
-                if self.current_wave_idx >= len(self.waves):
-                    self.finished_spawning = True
-            else:
-                return spawns
-
-        if self.current_wave_idx >= len(self.waves):
+            return ()
+        if self.start_time is None:
+            self.start_time = current_time
+
+        start = self.cursor
+        end = bisect_right(self.times, current_time - self.start_time, start)
+        if end == start:
+            return ()
+        self.cursor = self.total_spawned = end
+        self.current_wave_idx = bisect_right(self.wave_starts, self.times[end - 1]) - 1
+        if end >= len(self.times):
             self.finished_spawning = True
-            return spawns
-
-        wave = self.waves[self.current_wave_idx]
-
-        if self.spawned_in_wave >= wave["total"]:
-            self.waiting_wave_gap = True
-            self.wave_gap_end = current_time + wave["wave_gap"]
-            return spawns
-
-        if current_time >= self.next_spawn_time:
-            batch_size = min(wave["batch"], wave["total"] - self.spawned_in_wave)
-            if batch_size > 0:
-                count = random.randint(1, batch_size)
-                for _ in range(count):
-                    e_id = self._pick_enemy_type(wave)
-                    row = random.randint(0, 4)
-                    spawns.append((e_id, row))
-                    self.spawned_in_wave += 1
-                    self.total_spawned += 1
-                    if self.current_wave_idx == len(self.waves) - 1 and self.spawned_in_wave >= wave["total"]:
-                        self.finished_spawning = True
-                        return spawns
-
-                self.next_spawn_time = current_time + wave["gap"]
-
-        return spawns
-
-    def _pick_enemy_type(self, wave_def):
-        weights = wave_def.get("weights") or {0: 1, 1: 1}
-        ids = list(weights.keys())
-        probs = list(weights.values())
-        return random.choices(ids, weights=probs, k=1)[0]
+        return self.spawns[start:end]
 
 
 class EndlessWaveManager:
-    def __init__(self, difficulty=1.0):
+    def __init__(self, difficulty=1.0, seed=None, start_wave=1):
         self.difficulty = max(0.8, difficulty)
-        self.wave_index = 1
-        self.spawned_in_wave = 0
-        self.next_spawn_time = 0
-        self.waiting_wave_gap = False
-        self.wave_gap_end = 0
-        self.current_wave = self._make_wave(self.wave_index)
+        self.seed = seed if seed is not None else random.randrange(1 << 32)
+        self.wave_index = start_wave
         self.wave_started_ts = 0
+        self._load_wave()
+
+    def _load_wave(self):
+        # Each wave is its own timeline (times relative to the wave start);
+        # the next one starts wave_length ms later.
+        key = ("endless", self.wave_index, self.difficulty, self.seed)
+        self.current_wave, self.times, self.spawns, self.wave_length = _cached_schedule(key, self._compile)
+        self.cursor = 0
+
+    def get_state(self):
+        return {"wave_index": self.wave_index, "wave_started_ts": self.wave_started_ts, "cursor": self.cursor}
+
+    def set_state(self, state):
+        self.wave_index = state["wave_index"]
+        self._load_wave()
+        self.cursor = state["cursor"]
+        self.wave_started_ts = state["wave_started_ts"]
+
+    def _compile(self):
+        wave = self._make_wave(self.wave_index)
+        rng = random.Random(f"{self.seed}:waves:{self.wave_index}")
+        times = []
+        spawns = []
+        last = _compile_wave(wave, rng, 0, times, spawns)
+        return wave, tuple(times), tuple(spawns), last + wave["wave_gap"]
 
     def _make_wave(self, wave_num):
         df = self.difficulty
@@ -193,6 +288,7 @@ class EndlessWaveManager:
             "wave_gap": wave_gap,
             "batch": batch,
             "weights": weights,
+            "sampler": AliasTable(weights),
         }
 
     def _pool_for_wave(self, wave_num, df):
@@ -220,44 +316,22 @@ class EndlessWaveManager:
         return weights
 
     def update(self, current_time):
-        spawns = []
         if not self.wave_started_ts:
             self.wave_started_ts = current_time
 
-        if self.waiting_wave_gap:
-            if current_time >= self.wave_gap_end:
-                self.waiting_wave_gap = False
-                self.wave_index += 1
-                self.spawned_in_wave = 0
-                self.current_wave = self._make_wave(self.wave_index)
-                self.wave_started_ts = current_time
-            else:
+        spawns = []
+        t = current_time - self.wave_started_ts
+        while True:
+            end = bisect_right(self.times, t, self.cursor)
+            spawns.extend(self.spawns[self.cursor:end])
+            self.cursor = end
+            if t < self.wave_length:
                 return spawns
+            self.wave_started_ts += self.wave_length
+            t -= self.wave_length
+            self.wave_index += 1
+            self._load_wave()
 
-        wave = self.current_wave
-        if self.spawned_in_wave >= wave["total"]:
-            self.waiting_wave_gap = True
-            self.wave_gap_end = current_time + wave["wave_gap"]
-            return spawns
-
-        if current_time >= self.next_spawn_time:
-            batch_size = min(wave["batch"], wave["total"] - self.spawned_in_wave)
-            if batch_size > 0:
-                count = random.randint(1, batch_size)
-                for _ in range(count):
-                    e_id = self._pick_enemy_type(wave)
-                    row = random.randint(0, 4)
-                    spawns.append((e_id, row))
-                    self.spawned_in_wave += 1
-                self.next_spawn_time = current_time + wave["gap"]
-
-        return spawns
-
-    def _pick_enemy_type(self, wave_def):
-        weights = wave_def.get("weights") or {0: 1, 1: 1}
-        ids = list(weights.keys())
-        probs = list(weights.values())
-        return random.choices(ids, weights=probs, k=1)[0]
 
 
 def compute_level_difficulty(level):